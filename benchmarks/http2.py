@@ -0,0 +1,143 @@
+"""Compare HTTP/1.1 and HTTP/2 transports against a local stub server.
+
+The stub answers every GET with a small JSON document after a fixed delay,
+over HTTP/1.1 on one port and HTTP/2 (without TLS) on another. Each run
+sends the same number of requests through the querier's HTTP engine at a
+given concurrency and reports throughput and connections opened.
+
+Requires the h2 package. Run from the repository root:
+
+    python benchmarks/http2.py [--requests N] [--delay MS] [--concurrency 1 10 100]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+from h2.config import H2Configuration
+from h2.connection import H2Connection
+from h2.events import ConnectionTerminated, RequestReceived
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from mcp_server_peakmojo.server import PeakMojoQuerier, parse_arguments  # noqa: E402
+
+BODY = json.dumps({"data": [{"id": index, "name": f"User {index}"} for index in range(20)]}).encode()
+
+
+class Http1Stub(asyncio.Protocol):
+    """Minimal keep-alive HTTP/1.1 server for body-less requests"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.buffer = b""
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+
+    def data_received(self, data: bytes) -> None:
+        self.buffer += data
+        while b"\r\n\r\n" in self.buffer:
+            _, self.buffer = self.buffer.split(b"\r\n\r\n", 1)
+            asyncio.ensure_future(self.respond())
+
+    async def respond(self) -> None:
+        await asyncio.sleep(self.delay)
+        head = f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: {len(BODY)}\r\n\r\n"
+        if not self.transport.is_closing():
+            self.transport.write(head.encode() + BODY)
+
+
+class Http2Stub(asyncio.Protocol):
+    """Minimal HTTP/2 server speaking cleartext HTTP/2 with prior knowledge"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.connection = H2Connection(config=H2Configuration(client_side=False))
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+        self.connection.initiate_connection()
+        self.transport.write(self.connection.data_to_send())
+
+    def data_received(self, data: bytes) -> None:
+        for event in self.connection.receive_data(data):
+            if isinstance(event, RequestReceived):
+                asyncio.ensure_future(self.respond(event.stream_id))
+            elif isinstance(event, ConnectionTerminated):
+                self.transport.close()
+        self.transport.write(self.connection.data_to_send())
+
+    async def respond(self, stream_id: int) -> None:
+        await asyncio.sleep(self.delay)
+        if self.transport.is_closing():
+            return
+        self.connection.send_headers(stream_id, [
+            (":status", "200"),
+            ("content-type", "application/json"),
+            ("content-length", str(len(BODY))),
+        ])
+        self.connection.send_data(stream_id, BODY, end_stream=True)
+        self.transport.write(self.connection.data_to_send())
+
+
+async def run(base_url: str, http2: bool, concurrency: int, requests: int) -> dict:
+    """Send requests through a fresh querier and measure throughput"""
+    argv = ["--api-key", "benchmark", "--base-url", base_url, "--cache-ttl", "0", "--no-adaptive-concurrency"]
+    if http2:
+        argv.append("--http2-prior-knowledge")
+    querier = PeakMojoQuerier(parse_arguments(argv))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            await querier.fetch(f"/v1/users/{index}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+    pool = querier.pool_stats()
+    await querier.aclose()
+    return {
+        "seconds": elapsed,
+        "requests_per_second": requests / elapsed,
+        "connections_opened": pool["connections_opened"],
+        "versions": pool["responses_by_http_version"],
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000, help="Requests sent per run")
+    parser.add_argument("--delay", type=float, default=10, help="Stub response delay in milliseconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100], help="Concurrency levels to run")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    loop = asyncio.get_running_loop()
+    delay = args.delay / 1000
+    stubs = {}
+    for name, protocol in (("HTTP/1.1", Http1Stub), ("HTTP/2", Http2Stub)):
+        server = await loop.create_server(lambda protocol=protocol: protocol(delay), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        stubs[name] = (f"http://127.0.0.1:{port}", server)
+
+    print(f"{args.requests} requests per run, {args.delay:g} ms stub delay")
+    print(f"{'transport':<10} {'concurrency':>11} {'seconds':>8} {'req/s':>9} {'connections':>11}")
+    for concurrency in args.concurrency:
+        for name, (base_url, _) in stubs.items():
+            result = await run(base_url, name == "HTTP/2", concurrency, args.requests)
+            if set(result["versions"]) != {name}:
+                raise RuntimeError(f"Expected {name} responses, got {result['versions']}")
+            print(f"{name:<10} {concurrency:>11} {result['seconds']:>8.2f} {result['requests_per_second']:>9.0f} {result['connections_opened']:>11}")
+
+    for _, server in stubs.values():
+        server.close()
+        await server.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
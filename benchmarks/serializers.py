@@ -0,0 +1,64 @@
+"""Compare the output serializers on a large list response.
+
+Run from the repository root:
+
+    python benchmarks/serializers.py [--items N] [--repeat N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from mcp_server_peakmojo.serializers import SERIALIZERS  # noqa: E402
+
+
+def sample_response(items: int) -> dict:
+    """Build a user list shaped like a PeakMojo list endpoint response"""
+    return {
+        "data": [
+            {
+                "id": f"user-{index:06d}",
+                "name": f"User {index}",
+                "email": f"user{index}@example.com",
+                "active": index % 3 != 0,
+                "score": index * 1.5,
+                "tags": ["sales", "onboarding"] if index % 2 else [],
+                "manager": None,
+                "bio": "Héllo wörld: practices daily, #1 on the leaderboard\nSecond line",
+                "stats": {"practices": index % 40, "certificates": index % 5, "last_seen": "2024-01-01T10:00:00Z"},
+            }
+            for index in range(items)
+        ],
+        "page": 1,
+        "total_pages": 1,
+        "total": items,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    response = sample_response(args.items)
+    candidates = dict(SERIALIZERS)
+    candidates["yaml (pure Python emitter)"] = lambda value: yaml.dump(value, sort_keys=False, allow_unicode=True)
+
+    print(f"{args.items} items, best of {args.repeat} runs, libyaml available: {yaml.__with_libyaml__}")
+    print(f"{'format':<28} {'seconds':>9} {'output bytes':>13}")
+    for name, serializer in candidates.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            output = serializer(response)
+            best = min(best, time.perf_counter() - started)
+        print(f"{name:<28} {best:>9.4f} {len(output.encode()):>13}")
+
+
+if __name__ == "__main__":
+    main()
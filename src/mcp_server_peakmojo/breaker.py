@@ -0,0 +1,135 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional
+
+import httpx
+
+from .endpoints import EndpointRules
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """Raised instead of calling an endpoint group whose circuit is open"""
+
+    def __init__(self, group: str, retry_in: float):
+        super().__init__(f"Circuit for {group} is open after repeated failures, retry in {retry_in:.0f}s")
+        self.group = group
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Circuit breaker for one endpoint group.
+
+    Outcomes of the last ``window`` calls are kept. Once at least
+    ``min_calls`` are recorded and the share of failed or slow calls reaches
+    ``failure_rate``, the circuit opens and calls fail fast for
+    ``open_seconds``. A single probe call is then let through: success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, group: str, failure_rate: float = 0.5, slow_call_seconds: Optional[float] = None, window: int = 20, min_calls: int = 5, open_seconds: float = 30.0):
+        self.group = group
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def before_call(self) -> None:
+        """Let a call through, or raise CircuitOpenError"""
+        if self.state == OPEN and self._retry_in() <= 0:
+            self.state = HALF_OPEN
+            self.probing = False
+        if self.state == OPEN or (self.state == HALF_OPEN and self.probing):
+            self.rejected += 1
+            raise CircuitOpenError(self.group, self._retry_in())
+        if self.state == HALF_OPEN:
+            self.probing = True
+
+    def record(self, success: bool, elapsed: float) -> None:
+        """Record the outcome of a call let through by before_call"""
+        if success and self.slow_call_seconds is not None and elapsed > self.slow_call_seconds:
+            success = False
+        if self.state == HALF_OPEN:
+            self.probing = False
+            if success:
+                self.state = CLOSED
+                self.outcomes.clear()
+            else:
+                self._open()
+            return
+        self.outcomes.append(success)
+        failures = self.outcomes.count(False)
+        if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.failure_rate:
+            self._open()
+
+    def release(self) -> None:
+        """Forget a call that ended without an outcome, e.g. because it was cancelled"""
+        if self.state == HALF_OPEN:
+            self.probing = False
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self.outcomes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the breaker's state and recent failure rate"""
+        if self.state == OPEN and self._retry_in() <= 0:
+            state = HALF_OPEN
+        else:
+            state = self.state
+        recorded = len(self.outcomes)
+        return {
+            "state": state,
+            "recent_calls": recorded,
+            "recent_failure_rate": round(self.outcomes.count(False) / recorded, 3) if recorded else 0.0,
+            "retry_in": round(self._retry_in(), 1) if state == OPEN else None,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreakers:
+    """Circuit breakers keyed by endpoint group.
+
+    An endpoint belongs to the most specific configured group pattern, or
+    by default to its first two path segments, e.g. ``/v1/certificates``.
+    """
+
+    def __init__(self, groups: Optional[Iterable[str]] = None, **settings: Any):
+        self.settings = settings
+        self._groups = EndpointRules({pattern: pattern for pattern in groups or ()})
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def group_of(self, endpoint: str) -> str:
+        """Get the group an endpoint's breaker is keyed by"""
+        group = self._groups.get(endpoint)
+        if group is None:
+            segments = [segment for segment in endpoint.split("?")[0].split("/") if segment]
+            group = "/" + "/".join(segments[:2])
+        return group
+
+    def for_endpoint(self, endpoint: str) -> CircuitBreaker:
+        """Get the breaker guarding an endpoint"""
+        group = self.group_of(endpoint)
+        breaker = self._breakers.get(group)
+        if breaker is None:
+            breaker = self._breakers[group] = CircuitBreaker(group, **self.settings)
+        return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the state of every breaker"""
+        return {group: breaker.stats() for group, breaker in sorted(self._breakers.items())}
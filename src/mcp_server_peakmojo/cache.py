@@ -0,0 +1,200 @@
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from .endpoints import EndpointRules
+
+# Client errors that repeat for the same request, cached briefly so repeated bad lookups stay local
+NEGATIVE_CACHE_STATUSES = frozenset({400, 404, 405, 410, 414, 422})
+STALE_WHILE_REVALIDATE = "while_revalidate"
+STALE_IF_ERROR = "if_error"
+
+
+def canonical_key(method: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Build a cache key that is stable across parameter ordering"""
+    endpoint = endpoint.rstrip("/") or "/"
+    key = f"{method.upper()} {endpoint}"
+    if params:
+        key += "?" + json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return key
+
+
+def key_endpoint(key: str) -> str:
+    """Get the endpoint path a cache key was built from"""
+    return key.split(" ", 1)[-1].split("?", 1)[0]
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    ttl: float
+    stored_at: float = field(default_factory=time.monotonic)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    status_code: int = 200
+
+    @property
+    def is_negative(self) -> bool:
+        """Whether the entry holds an error response rather than a decoded value"""
+        return self.status_code >= 400
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.age < self.ttl
+
+    @property
+    def staleness(self) -> float:
+        """Seconds since the entry expired, 0 while it is fresh"""
+        return max(0.0, self.age - self.ttl)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Get the headers asking the API to answer 304 if the entry is still current"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """In-process TTL cache for decoded API responses.
+
+    Entries are bounded by their total encoded size and evicted in least
+    recently used order once the bound is exceeded. Expired entries are not
+    served as hits but are kept until evicted, so they remain available as
+    a fallback when the API is failing and can be revalidated cheaply when
+    they carry an ETag or Last-Modified validator. Responses with validators
+    are kept even with a TTL of 0, to be revalidated on every use.
+    Deterministic client errors are cached for ``negative_ttl`` at most,
+    holding the error response itself; they are never served stale.
+    """
+
+    def __init__(self, max_bytes: int, default_ttl: float, ttls: Optional[Dict[str, float]] = None, stale_while_revalidate: float = 0.0, stale_if_error: float = 0.0, stale_limits: Optional[Dict[str, Any]] = None, negative_ttl: float = 0.0):
+        self.max_bytes = max_bytes
+        self.ttls = EndpointRules(ttls, default=default_ttl)
+        self.stale_defaults = {STALE_WHILE_REVALIDATE: stale_while_revalidate, STALE_IF_ERROR: stale_if_error}
+        self.stale_limits = EndpointRules(stale_limits)
+        self.stale_served = {STALE_WHILE_REVALIDATE: 0, STALE_IF_ERROR: 0}
+        self.negative_ttl = negative_ttl
+        self.negative_hits = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.revalidations = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.invalidated = 0
+
+    def ttl_for(self, endpoint: str) -> float:
+        """Get the time-to-live configured for an endpoint"""
+        return self.ttls.get(endpoint) or 0
+
+    def negative_ttl_for(self, endpoint: str) -> float:
+        """Get the time-to-live of an endpoint's cached client errors"""
+        return min(self.negative_ttl, self.ttl_for(endpoint))
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Get a fresh entry, counting the lookup as a hit or a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if not entry.is_fresh:
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        if entry.is_negative:
+            self.negative_hits += 1
+        return entry
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Get a successful entry whether or not it is fresh, without counting a lookup"""
+        entry = self._entries.get(key)
+        if entry is None or entry.is_negative:
+            return None
+        return entry
+
+    def max_stale(self, endpoint: str, mode: str) -> float:
+        """Get how many seconds past expiry an endpoint's entries may be served in a stale mode"""
+        limit = self.stale_limits.get(endpoint)
+        if isinstance(limit, dict):
+            return limit.get(mode, self.stale_defaults[mode]) or 0.0
+        if limit is not None:
+            return limit
+        return self.stale_defaults[mode]
+
+    def get_stale(self, key: str, endpoint: str, mode: str) -> Optional[CacheEntry]:
+        """Get an expired entry that may still be served in the given stale mode"""
+        entry = self.peek(key)
+        if entry is None or entry.is_fresh or entry.staleness > self.max_stale(endpoint, mode):
+            return None
+        self.stale_served[mode] += 1
+        return entry
+
+    def set(self, key: str, value: Any, size: int, ttl: float, etag: Optional[str] = None, last_modified: Optional[str] = None, status_code: int = 200, age: float = 0.0) -> Optional[CacheEntry]:
+        """Store a value fetched age seconds ago, evicting least recently used entries if needed"""
+        if (ttl <= 0 and not (etag or last_modified)) or size > self.max_bytes:
+            return None
+        if key in self._entries:
+            self._remove(key)
+        entry = CacheEntry(value=value, size=size, ttl=max(ttl, 0), stored_at=time.monotonic() - age, etag=etag, last_modified=last_modified, status_code=status_code)
+        self._entries[key] = entry
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return entry
+
+    def record_revalidation(self, not_modified: bool) -> None:
+        """Count a conditional request and whether the API answered 304"""
+        self.revalidations += 1
+        if not_modified:
+            self.not_modified += 1
+
+    def invalidate(self, affected: Callable[[str], bool]) -> int:
+        """Drop every entry whose endpoint is affected and return how many were dropped"""
+        self.invalidations += 1
+        keys = [key for key in self._entries if affected(key_endpoint(key))]
+        for key in keys:
+            self._remove(key)
+        self.invalidated += len(keys)
+        return len(keys)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache usage counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "negative_hits": self.negative_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "revalidations": self.revalidations,
+            "revalidated_not_modified": self.not_modified,
+            "revalidation_hit_rate": round(self.not_modified / self.revalidations, 4) if self.revalidations else 0.0,
+            "stale_served": dict(self.stale_served),
+            "invalidations": self.invalidations,
+            "entries_invalidated": self.invalidated,
+        }
@@ -0,0 +1,106 @@
+import gzip
+from typing import Any, Dict, List, Optional
+
+from .latency import endpoint_template
+
+# httpx decodes brotli and zstd responses when these optional packages are installed
+try:
+    import brotli  # noqa: F401
+    HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        HAS_BROTLI = True
+    except ImportError:
+        HAS_BROTLI = False
+
+try:
+    import zstandard  # noqa: F401
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+
+def accept_encoding() -> str:
+    """Get the Accept-Encoding header listing every response encoding that can be decoded"""
+    encodings: List[str] = []
+    if HAS_ZSTD:
+        encodings.append("zstd")
+    if HAS_BROTLI:
+        encodings.append("br")
+    encodings += ["gzip", "deflate"]
+    return ", ".join(encodings)
+
+
+def compress_body(body: bytes) -> bytes:
+    """Compress a request body for sending with Content-Encoding: gzip"""
+    return gzip.compress(body, compresslevel=6)
+
+
+class _Counters:
+    def __init__(self):
+        self.responses = 0
+        self.compressed_responses = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self.requests_compressed = 0
+        self.request_bytes = 0
+        self.request_wire_bytes = 0
+
+
+class CompressionStats:
+    """Bytes transferred versus decoded per endpoint template"""
+
+    def __init__(self):
+        self._endpoints: Dict[str, _Counters] = {}
+        self._rejected: set = set()
+
+    def _counters(self, endpoint: str) -> _Counters:
+        template = endpoint_template(endpoint)
+        counters = self._endpoints.get(template)
+        if counters is None:
+            counters = self._endpoints[template] = _Counters()
+        return counters
+
+    def record_response(self, endpoint: str, encoding: Optional[str], wire_bytes: int, decoded_bytes: int) -> None:
+        counters = self._counters(endpoint)
+        counters.responses += 1
+        if encoding and encoding != "identity":
+            counters.compressed_responses += 1
+        counters.wire_bytes += wire_bytes
+        counters.decoded_bytes += decoded_bytes
+
+    def record_request(self, endpoint: str, body_bytes: int, wire_bytes: int) -> None:
+        counters = self._counters(endpoint)
+        counters.requests_compressed += 1
+        counters.request_bytes += body_bytes
+        counters.request_wire_bytes += wire_bytes
+
+    def accepts_compressed_body(self, endpoint: str) -> bool:
+        """Check that the endpoint has not rejected a compressed request body"""
+        return endpoint_template(endpoint) not in self._rejected
+
+    def reject_compressed_body(self, endpoint: str) -> None:
+        """Stop compressing request bodies to an endpoint that answered 415"""
+        self._rejected.add(endpoint_template(endpoint))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get compression ratios and bytes saved of every endpoint template"""
+        endpoints = {}
+        for template, counters in sorted(self._endpoints.items()):
+            entry: Dict[str, Any] = {
+                "responses": counters.responses,
+                "compressed_responses": counters.compressed_responses,
+                "response_ratio": round(counters.decoded_bytes / counters.wire_bytes, 2) if counters.wire_bytes else None,
+                "response_bytes_saved": counters.decoded_bytes - counters.wire_bytes,
+            }
+            if counters.requests_compressed:
+                entry["requests_compressed"] = counters.requests_compressed
+                entry["request_ratio"] = round(counters.request_bytes / counters.request_wire_bytes, 2)
+                entry["request_bytes_saved"] = counters.request_bytes - counters.request_wire_bytes
+            endpoints[template] = entry
+        return {
+            "accept_encoding": accept_encoding(),
+            "uncompressed_request_endpoints": sorted(self._rejected),
+            "endpoints": endpoints,
+        }
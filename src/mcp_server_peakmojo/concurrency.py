@@ -0,0 +1,139 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from .latency import latency_key
+from .scheduling import INTERACTIVE, FairQueue
+
+OVERLOAD_STATUSES = frozenset({429, 503})
+
+
+class CallOutcome:
+    """Outcome of a call holding a concurrency slot, set by the caller"""
+
+    def __init__(self, waited: float = 0.0):
+        self.waited = waited
+        self.overloaded = False
+
+
+class ConcurrencyLimiter:
+    """Adaptive limit on in-flight requests using additive increase, multiplicative decrease.
+
+    While the limit is in use and latency stays within ``tolerance`` times
+    the baseline of the method on the endpoint, the limit grows by about
+    one per round trip. Latency inflation, timeouts and 429/503 responses
+    cut it by ``backoff``, at most once per round trip. Calls over the limit wait in a weighted
+    fair queue by priority class. With ``adaptive`` off the limit stays at
+    ``max_limit``.
+    """
+
+    def __init__(self, initial: int = 20, min_limit: int = 1, max_limit: int = 100, backoff: float = 0.7, tolerance: float = 2.0, adaptive: bool = True, weights: Optional[Dict[str, float]] = None):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.adaptive = adaptive
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)) if adaptive else self.max_limit)
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self._waiters = FairQueue(weights)
+        self._baselines: Dict[str, float] = {}
+        self._last_cut = 0.0
+        self.queued = 0
+        self.max_queued = 0
+        self.total_wait = 0.0
+        self.increases = 0
+        self.cuts = 0
+
+    def _wake(self) -> None:
+        while self.in_flight < int(self.limit):
+            waiter = self._waiters.pop()
+            if waiter is None:
+                break
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    async def acquire(self, priority: str = INTERACTIVE) -> float:
+        """Wait for a free slot and return how long that took"""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return 0.0
+        started = time.monotonic()
+        waiter = self._waiters.push(priority)
+        self.queued += 1
+        self.max_queued = max(self.max_queued, len(self._waiters))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted as the caller gave up, pass it on
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        waited = time.monotonic() - started
+        self.total_wait += waited
+        return waited
+
+    def release(self, method: str, endpoint: str, started: Optional[float] = None, overloaded: bool = False) -> None:
+        """Free a slot, adapting the limit to the call's latency if it started at started"""
+        in_use = self.in_flight >= int(self.limit) or bool(self._waiters)
+        self.in_flight -= 1
+        if started is not None and self.adaptive:
+            now = time.monotonic()
+            elapsed = now - started
+            key = latency_key(method, endpoint)
+            baseline = self._baselines.get(key)
+            inflated = baseline is not None and elapsed > baseline * self.tolerance + 0.005
+            if overloaded or inflated:
+                # Calls sent before the last cut already saw the old limit
+                if started >= self._last_cut and self.limit > self.min_limit:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_cut = now
+                    self.cuts += 1
+            else:
+                if baseline is None or elapsed < baseline:
+                    self._baselines[key] = elapsed
+                else:
+                    # Drift upwards slowly so a lasting latency change becomes the new baseline
+                    self._baselines[key] = baseline + (elapsed - baseline) * 0.05
+                if in_use and self.limit < self.max_limit:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                    self.increases += 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, method: str, endpoint: str, priority: str = INTERACTIVE) -> AsyncIterator[CallOutcome]:
+        """Hold a slot for the duration of a call of method to endpoint"""
+        waited = await self.acquire(priority)
+        started = time.monotonic()
+        outcome = CallOutcome(waited)
+        try:
+            yield outcome
+        except httpx.TimeoutException:
+            self.release(method, endpoint, started, overloaded=True)
+            raise
+        except BaseException:
+            self.release(method, endpoint)
+            raise
+        self.release(method, endpoint, started, outcome.overloaded)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the current limit, queue and adjustment counters"""
+        return {
+            "adaptive": self.adaptive,
+            "limit": int(self.limit),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "max_queue_depth": self.max_queued,
+            "queued": self.queued,
+            "total_wait_seconds": round(self.total_wait, 3),
+            "increases": self.increases,
+            "cuts": self.cuts,
+            "classes": self._waiters.stats(),
+        }
@@ -0,0 +1,248 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from .cache import key_endpoint
+
+logger = logging.getLogger("peakmojo_server")
+
+# Seconds between recounts of the database, picking up other processes' writes
+RECOUNT_INTERVAL = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def credentials_fingerprint(base_url: str, api_key: Optional[str]) -> str:
+    """Get a short hash identifying the API and credentials responses were fetched with"""
+    return hashlib.sha256(f"{base_url}\0{api_key or ''}".encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class DiskEntry:
+    value: Any
+    size: int
+    age: float
+    ttl: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class DiskCache:
+    """SQLite response cache shared by every server process on the host.
+
+    Values are stored as zlib-compressed JSON under keys prefixed with a
+    fingerprint of the API base URL and key, so processes using other
+    credentials never see each other's responses. The database runs in WAL
+    mode so several processes can read and write concurrently. Rows expired
+    for longer than ``keep_expired`` seconds are purged unless they carry a
+    validator to revalidate them with, and least recently used rows are
+    evicted once the compressed values exceed ``max_bytes``. All database
+    work runs in submission order on one background thread, so writes and
+    invalidations never block the event loop and apply in the order made.
+    The entry count and size are tracked as rows are written and deleted,
+    and recounted periodically to pick up changes made by other processes.
+    The database holds API responses, so it is created readable by its
+    owner only.
+    """
+
+    def __init__(self, path: str, fingerprint: str, max_bytes: int, keep_expired: float = 0.0):
+        self.path = os.path.expanduser(path)
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        self.keep_expired = keep_expired
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+        # Entries and compressed bytes in the database, as last known by the background thread
+        self.entries: Optional[int] = None
+        self.size: Optional[int] = None
+        self._counted_at = 0.0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="peakmojo-disk-cache")
+        os.makedirs(os.path.dirname(self.path) or ".", mode=0o700, exist_ok=True)
+        # SQLite gives its journal files the permissions of the database file
+        os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+        self._db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._executor.submit(self._guarded, self._recount)
+
+    def _key(self, key: str) -> str:
+        return f"{self.fingerprint} {key}"
+
+    def _guarded(self, func: Callable[..., Any], *args: Any) -> Any:
+        try:
+            return func(*args)
+        except (sqlite3.Error, OSError) as e:
+            # The disk tier is an optimisation, never fail a request because of it
+            self.errors += 1
+            logger.warning(f"Disk cache error: {e}")
+            return None
+
+    def _submit(self, func: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+        return asyncio.get_running_loop().run_in_executor(self._executor, self._guarded, func, *args)
+
+    def _recount(self) -> None:
+        with self._lock:
+            self.entries, self.size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        self._counted_at = time.monotonic()
+
+    def _removed(self, entries: int, size: int) -> None:
+        if self.entries is not None:
+            self.entries = max(self.entries - entries, 0)
+            self.size = max(self.size - size, 0)
+
+    def _get(self, key: str) -> Optional[DiskEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, size, stored_at, expires_at, etag, last_modified FROM responses WHERE key = ?",
+                (self._key(key),),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            now = time.time()
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, self._key(key)))
+        value, size, stored_at, expires_at, etag, last_modified = row
+        try:
+            raw = zlib.decompress(value)
+            decoded = json.loads(raw)
+        except (zlib.error, TypeError, ValueError) as e:
+            # A corrupt row, or one written by something else, is dropped and treated as a miss
+            self.errors += 1
+            self.misses += 1
+            logger.warning(f"Dropping unreadable disk cache entry {key}: {e}")
+            with self._lock:
+                if self._db.execute("DELETE FROM responses WHERE key = ?", (self._key(key),)).rowcount > 0:
+                    self._removed(1, size)
+            return None
+        if now < expires_at:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return DiskEntry(
+            value=decoded,
+            size=len(raw),
+            age=max(0.0, now - stored_at),
+            ttl=expires_at - stored_at,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+    async def get(self, key: str) -> Optional[DiskEntry]:
+        """Get a stored response, fresh or expired"""
+        return await self._submit(self._get, key)
+
+    def _set(self, key: str, value: Any, ttl: float, etag: Optional[str], last_modified: Optional[str]) -> None:
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            replaced = self._db.execute("SELECT size FROM responses WHERE key = ?", (self._key(key),)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, stored_at, expires_at, accessed_at, etag, last_modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(key), blob, len(blob), now, now + ttl, now, etag, last_modified),
+            )
+            self.writes += 1
+            if self.entries is not None:
+                self.entries += 0 if replaced else 1
+                self.size += len(blob) - (replaced[0] if replaced else 0)
+            self._evict(now)
+
+    def set(self, key: str, value: Any, ttl: float, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Store a decoded response in the background"""
+        self._submit(self._set, key, value, ttl, etag, last_modified)
+
+    def _evict(self, now: float) -> None:
+        expired = "expires_at < ? AND etag IS NULL AND last_modified IS NULL"
+        entries, size = self._db.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE {expired}", (now - self.keep_expired,)).fetchone()
+        if entries:
+            purged = self._db.execute(f"DELETE FROM responses WHERE {expired}", (now - self.keep_expired,)).rowcount
+            self.evictions += max(purged, 0)
+            self._removed(entries, size)
+        # Only count the whole table when over the cap, or now and then for other processes' writes
+        if self.size is not None and self.size <= self.max_bytes and time.monotonic() - self._counted_at < RECOUNT_INTERVAL:
+            return
+        self.entries, self.size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        self._counted_at = time.monotonic()
+        if self.size <= self.max_bytes:
+            return
+        total = self.size
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+                self.evictions += 1
+                self._removed(1, size)
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def _invalidate(self, affected: Callable[[str], bool]) -> None:
+        prefix = self.fingerprint + " "
+        with self._lock:
+            rows = [
+                (key, size) for key, size in self._db.execute("SELECT key, size FROM responses WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+                if affected(key_endpoint(key[len(prefix):]))
+            ]
+            self._db.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key, _ in rows])
+            self._removed(len(rows), sum(size for _, size in rows))
+
+    def invalidate(self, affected: Callable[[str], bool]) -> None:
+        """Drop every stored response whose endpoint is affected in the background"""
+        self._submit(self._invalidate, affected)
+
+    async def flush(self) -> None:
+        """Wait until every pending write and invalidation is applied"""
+        await self._submit(lambda: None)
+
+    async def close(self) -> None:
+        """Apply pending work, then stop the background thread and close the database"""
+        await self.flush()
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the last known size of the database and usage counters of this process"""
+        return {
+            "path": self.path,
+            "entries": self.entries,
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
@@ -0,0 +1,31 @@
+import fnmatch
+from typing import Any, Dict, Optional
+
+
+class EndpointRules:
+    """Map endpoint patterns to values.
+
+    A pattern is either a path prefix (``/v1/users``) or a glob
+    (``/v1/users/*/stats``). When several patterns match an endpoint the
+    longest one wins, so specific rules override general ones.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, Any]] = None, default: Any = None):
+        self.default = default
+        self._rules = sorted((rules or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    @staticmethod
+    def matches(pattern: str, endpoint: str) -> bool:
+        """Check whether a pattern matches an endpoint"""
+        if any(char in pattern for char in "*?["):
+            return fnmatch.fnmatchcase(endpoint, pattern)
+        if endpoint == pattern or pattern.endswith("/"):
+            return endpoint.startswith(pattern)
+        return endpoint.startswith(pattern + "/") or endpoint.startswith(pattern + "?")
+
+    def get(self, endpoint: str) -> Any:
+        """Get the value of the most specific rule matching an endpoint"""
+        for pattern, value in self._rules:
+            if self.matches(pattern, endpoint):
+                return value
+        return self.default
@@ -0,0 +1,79 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def _consume(task: "asyncio.Task[Any]") -> None:
+    # Losing attempts may fail after the race is decided, don't warn about it
+    if not task.cancelled():
+        task.exception()
+
+
+class Hedger:
+    """Send a second copy of a slow request and keep whichever answers first.
+
+    Every hedgeable request earns ``budget`` hedge credits (up to
+    ``max_credits``) and every hedge spends one, so hedges add at most
+    that share of extra load however slow the API gets.
+    """
+
+    def __init__(self, budget: float = 0.05, max_credits: float = 10.0):
+        self.budget = budget
+        self.max_credits = max_credits
+        self.credits = 0.0
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.denied = 0
+
+    async def run(self, call: Callable[[], Awaitable[T]], delay: Optional[float], discard: Callable[[T], Awaitable[None]]) -> T:
+        """Await call(), calling it again if the first call takes longer than delay.
+
+        The first successful result wins and the other call is cancelled, or
+        passed to discard if it completed too. Without a delay the call is
+        not hedged.
+        """
+        if delay is None:
+            return await call()
+        self.requests += 1
+        self.credits = min(self.max_credits, self.credits + self.budget)
+        tasks: List["asyncio.Task[T]"] = [asyncio.ensure_future(call())]
+        tasks[0].add_done_callback(_consume)
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                if self.credits >= 1:
+                    self.credits -= 1
+                    self.hedges_sent += 1
+                    hedge = asyncio.ensure_future(call())
+                    hedge.add_done_callback(_consume)
+                    tasks.append(hedge)
+                else:
+                    self.denied += 1
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winners = [task for task in tasks if task in done and task.exception() is None]
+                if winners:
+                    for task in winners[1:]:
+                        await discard(task.result())
+                    if winners[0] is not tasks[0]:
+                        self.hedges_won += 1
+                    return winners[0].result()
+            raise tasks[0].exception()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the hedge budget and counters"""
+        return {
+            "budget": self.budget,
+            "credits": round(self.credits, 2),
+            "hedgeable_requests": self.requests,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "hedges_denied": self.denied,
+        }
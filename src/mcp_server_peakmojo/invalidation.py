@@ -0,0 +1,46 @@
+from typing import Dict, Iterable, List, Optional
+
+from .endpoints import EndpointRules
+
+
+def _path(endpoint: str) -> str:
+    return endpoint.split("?", 1)[0].rstrip("/") or "/"
+
+
+def ancestors(endpoint: str) -> List[str]:
+    """Get the parent resource paths of an endpoint, e.g. /v1/users/42 and /v1/users for /v1/users/42/stats"""
+    segments = [segment for segment in _path(endpoint).split("/") if segment]
+    return ["/" + "/".join(segments[:length]) for length in range(len(segments) - 1, 0, -1)]
+
+
+class InvalidationRules:
+    """Decide which cached GET responses a mutating request makes stale.
+
+    By default a mutation of ``/v1/users/42/stats`` invalidates that path
+    and everything below it, plus its parent resources ``/v1/users/42`` and
+    ``/v1/users`` (with any query parameters) but not their other children
+    such as ``/v1/users/43``. Configured rules map mutation endpoint
+    patterns to further GET endpoint patterns they affect, e.g.
+    ``{"/v1/users/*/certificates": ["/v1/leaderboard"]}``.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, Iterable[str]]] = None):
+        self.rules = {pattern: list(targets) for pattern, targets in (rules or {}).items()}
+
+    def targets(self, endpoint: str) -> List[str]:
+        """Get the configured GET patterns affected by a mutation of endpoint"""
+        targets: List[str] = []
+        for pattern, patterns in self.rules.items():
+            if EndpointRules.matches(pattern, _path(endpoint)):
+                targets += patterns
+        return targets
+
+    def affects(self, endpoint: str, cached_endpoint: str, targets: Optional[List[str]] = None) -> bool:
+        """Check whether a mutation of endpoint invalidates a cached GET of cached_endpoint"""
+        path = _path(endpoint)
+        cached_path = _path(cached_endpoint)
+        if EndpointRules.matches(path, cached_path) or cached_path in ancestors(path):
+            return True
+        if targets is None:
+            targets = self.targets(endpoint)
+        return any(EndpointRules.matches(target, cached_path) for target in targets)
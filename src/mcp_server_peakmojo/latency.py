@@ -0,0 +1,97 @@
+import math
+import re
+from typing import Any, Dict, Optional, Tuple
+
+_ID_SEGMENT = re.compile(
+    r"\d+"
+    r"|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|[0-9a-fA-F]{16,}"
+    r"|(?=[A-Za-z_-]*\d)[A-Za-z0-9_-]{12,}"
+)
+
+
+def endpoint_template(endpoint: str) -> str:
+    """Replace id-like path segments so e.g. /v1/users/42 becomes /v1/users/{id}"""
+    path = endpoint.split("?", 1)[0]
+    segments = ["{id}" if _ID_SEGMENT.fullmatch(segment) else segment for segment in path.split("/")]
+    return "/".join(segments) or "/"
+
+
+def latency_key(method: str, endpoint: str) -> str:
+    """Key latency history by method too, so e.g. slow POSTs are not judged by fast GETs of the same path"""
+    return f"{method.upper()} {endpoint_template(endpoint)}"
+
+
+class LatencyHistogram:
+    """Streaming latency distribution with log-spaced buckets.
+
+    Each bucket is about 10% wide, so percentiles are accurate to that
+    resolution whatever the number of samples. Counts are halved every
+    ``decay_every`` samples so the distribution follows recent behaviour.
+    """
+
+    MIN_SECONDS = 0.001
+    GROWTH = 1.1
+
+    def __init__(self, decay_every: int = 1000):
+        self.decay_every = decay_every
+        self.buckets: Dict[int, float] = {}
+        self.count = 0.0
+        self.samples = 0
+
+    def _bucket(self, seconds: float) -> int:
+        return max(0, math.ceil(math.log(max(seconds, self.MIN_SECONDS) / self.MIN_SECONDS, self.GROWTH)))
+
+    def record(self, seconds: float) -> None:
+        bucket = self._bucket(seconds)
+        self.buckets[bucket] = self.buckets.get(bucket, 0.0) + 1
+        self.count += 1
+        self.samples += 1
+        if self.samples % self.decay_every == 0:
+            self.buckets = {key: value / 2 for key, value in self.buckets.items() if value >= 0.5}
+            self.count = sum(self.buckets.values())
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """Get the latency below which the given share of recent requests completed"""
+        if not self.count:
+            return None
+        threshold = quantile * self.count
+        seen = 0.0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= threshold:
+                return self.MIN_SECONDS * self.GROWTH ** bucket
+        return self.MIN_SECONDS * self.GROWTH ** max(self.buckets)
+
+
+class LatencyTracker:
+    """Latency histograms per method and endpoint template"""
+
+    def __init__(self, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def record(self, method: str, endpoint: str, seconds: float) -> None:
+        key = latency_key(method, endpoint)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def percentile(self, method: str, endpoint: str, quantile: float) -> Optional[float]:
+        """Get a latency percentile of a method on an endpoint, once enough samples are recorded"""
+        histogram = self._histograms.get(latency_key(method, endpoint))
+        if histogram is None or histogram.samples < self.min_samples:
+            return None
+        return histogram.percentile(quantile)
+
+    def stats(self, quantiles: Tuple[float, ...] = (0.5, 0.95, 0.99)) -> Dict[str, Any]:
+        """Get recent latency percentiles, in milliseconds, of every method and endpoint template"""
+        stats = {}
+        for key, histogram in sorted(self._histograms.items()):
+            entry: Dict[str, Any] = {"samples": histogram.samples}
+            for quantile in quantiles:
+                value = histogram.percentile(quantile)
+                entry[f"p{round(quantile * 100)}_ms"] = round(value * 1000, 1) if value is not None else None
+            stats[key] = entry
+        return stats
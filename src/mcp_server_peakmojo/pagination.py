@@ -0,0 +1,249 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+
+# Envelope keys used by list endpoints, in order of preference
+ITEM_KEYS = ("data", "items", "results", "records")
+META_KEYS = ("meta", "pagination", "paging")
+# Response page/offset field -> request parameter selecting it
+PAGE_KEYS = {"page": "page", "current_page": "page", "page_number": "page"}
+TOTAL_PAGES_KEYS = ("total_pages", "last_page", "page_count", "pages")
+OFFSET_KEYS = {"offset": "offset", "skip": "skip"}
+LIMIT_KEYS = ("limit", "per_page", "page_size")
+TOTAL_KEYS = ("total", "count", "total_count")
+HAS_MORE_KEYS = ("has_more", "has_next", "hasMore")
+NEXT_LINK_KEYS = ("next", "next_url")
+# Response cursor field -> request parameter carrying it
+CURSOR_KEYS = {
+    "next_cursor": "cursor",
+    "cursor": "cursor",
+    "next_page_token": "page_token",
+    "nextPageToken": "pageToken",
+}
+
+FetchPage = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class PaginationScheme:
+    kind: str  # "page", "offset", "cursor" or "next"
+    items_key: str
+    param: str = ""
+    position_key: str = ""
+    cursor_key: str = ""
+    current: int = 0
+    step: int = 1
+    last: Optional[int] = None
+
+
+def _lookup(body: Dict[str, Any], keys: Tuple[str, ...]) -> Tuple[Optional[str], Any]:
+    """Find the first of keys in the envelope or its metadata block"""
+    scopes = [body] + [body[key] for key in META_KEYS if isinstance(body.get(key), dict)]
+    for scope in scopes:
+        for key in keys:
+            if scope.get(key) is not None:
+                return key, scope[key]
+    return None, None
+
+
+def page_items(body: Any, items_key: str) -> list:
+    """Get the list of items carried by a page"""
+    if isinstance(body, dict) and isinstance(body.get(items_key), list):
+        return body[items_key]
+    return []
+
+
+def detect_pagination(body: Any) -> Optional[PaginationScheme]:
+    """Work out how a list response is paginated, if at all"""
+    if not isinstance(body, dict):
+        return None
+    items_key = next((key for key in ITEM_KEYS if isinstance(body.get(key), list)), None)
+    if items_key is None:
+        return None
+    count = len(body[items_key])
+
+    for response_key, request_param in CURSOR_KEYS.items():
+        _, cursor = _lookup(body, (response_key,))
+        if isinstance(cursor, str) and cursor:
+            return PaginationScheme(kind="cursor", items_key=items_key, param=request_param, cursor_key=response_key)
+
+    page_key, page = _lookup(body, tuple(PAGE_KEYS))
+    if isinstance(page, int):
+        _, last = _lookup(body, TOTAL_PAGES_KEYS)
+        if not isinstance(last, int):
+            _, total = _lookup(body, TOTAL_KEYS)
+            _, per_page = _lookup(body, LIMIT_KEYS)
+            if isinstance(total, int) and isinstance(per_page, int) and per_page > 0:
+                last = -(-total // per_page)
+            else:
+                last = None
+        return PaginationScheme(kind="page", items_key=items_key, param=PAGE_KEYS[page_key], position_key=page_key, current=page, last=last)
+
+    offset_key, offset = _lookup(body, tuple(OFFSET_KEYS))
+    if isinstance(offset, int):
+        _, limit = _lookup(body, LIMIT_KEYS)
+        step = limit if isinstance(limit, int) and limit > 0 else count
+        _, total = _lookup(body, TOTAL_KEYS)
+        last = total - 1 if isinstance(total, int) else None
+        return PaginationScheme(kind="offset", items_key=items_key, param=OFFSET_KEYS[offset_key], position_key=offset_key, current=offset, step=step or 1, last=last)
+
+    _, next_link = _lookup(body, NEXT_LINK_KEYS)
+    if isinstance(next_link, str) and next_link:
+        return PaginationScheme(kind="next", items_key=items_key)
+
+    return None
+
+
+def _has_more(body: Any, scheme: PaginationScheme) -> bool:
+    """Check whether a page says more pages follow it"""
+    if not page_items(body, scheme.items_key):
+        return False
+    if isinstance(body, dict):
+        _, has_more = _lookup(body, HAS_MORE_KEYS)
+        if has_more is False:
+            return False
+    return True
+
+
+def _past_end(body: Any, scheme: PaginationScheme, position: int) -> bool:
+    """Check whether a page reports another position than requested
+
+    APIs clamping out-of-range pages do so, as do APIs ignoring the request
+    parameter, which would otherwise return the same page over and over.
+    """
+    if not isinstance(body, dict):
+        return False
+    _, reported = _lookup(body, (scheme.position_key,))
+    return isinstance(reported, int) and reported != position
+
+
+def _next_request(body: Any, scheme: PaginationScheme, endpoint: str, params: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Build the request for the page following body in sequential schemes"""
+    if not _has_more(body, scheme):
+        return None
+    if scheme.kind == "cursor":
+        _, cursor = _lookup(body, (scheme.cursor_key,))
+        if not isinstance(cursor, str) or not cursor:
+            return None
+        return endpoint, {**params, scheme.param: cursor}
+    _, next_link = _lookup(body, NEXT_LINK_KEYS)
+    if not isinstance(next_link, str) or not next_link:
+        return None
+    parts = urlsplit(next_link)
+    return parts.path or endpoint, dict(parse_qsl(parts.query))
+
+
+async def _numbered_pages(fetch_page: FetchPage, scheme: PaginationScheme, endpoint: str, params: Dict[str, Any], max_pages: int, window: int, page_size: int) -> AsyncIterator[Any]:
+    """Yield pages of page/offset schemes in order, prefetching up to window pages ahead
+
+    The list ends at the first page reporting another position than
+    requested. Without a known page count, pages are fetched speculatively
+    and the list also ends at the first page that is short, empty or
+    rejected with a client error.
+    """
+    positions = (scheme.current + scheme.step * index for index in range(1, max_pages))
+    pending: "list[Tuple[int, asyncio.Task[Any]]]" = []
+
+    def schedule() -> None:
+        while len(pending) < window:
+            position = next(positions, None)
+            if position is None or (scheme.last is not None and position > scheme.last):
+                return
+            pending.append((position, asyncio.ensure_future(fetch_page(endpoint, {**params, scheme.param: position}))))
+
+    try:
+        schedule()
+        while pending:
+            position, task = pending.pop(0)
+            try:
+                page = await task
+            except httpx.HTTPStatusError as e:
+                # APIs may answer the first page past the end with 404, 400 or 422
+                if scheme.last is None and e.response.status_code < 500:
+                    return
+                raise
+            if _past_end(page, scheme, position):
+                return
+            yield page
+            if scheme.last is None and (len(page_items(page, scheme.items_key)) < page_size or not _has_more(page, scheme)):
+                return
+            schedule()
+    finally:
+        for _, task in pending:
+            if task.done() and not task.cancelled():
+                task.exception()
+            task.cancel()
+
+
+async def _linked_pages(fetch_page: FetchPage, first_page: Any, scheme: PaginationScheme, endpoint: str, params: Dict[str, Any], max_pages: int) -> AsyncIterator[Any]:
+    """Yield pages of cursor/next-link schemes, which can only be fetched one after another"""
+    page = first_page
+    for _ in range(1, max_pages):
+        request = _next_request(page, scheme, endpoint, params)
+        if request is None:
+            return
+        endpoint, params = request
+        page = await fetch_page(endpoint, params)
+        yield page
+
+
+async def paginate(fetch_page: FetchPage, first_page: Any, scheme: PaginationScheme, endpoint: str, params: Dict[str, Any], max_items: Optional[int] = None, max_bytes: Optional[int] = None, max_pages: int = 50, window: int = 4) -> Dict[str, Any]:
+    """Follow a paginated list and merge its pages into the first page's envelope.
+
+    Fetching stops as soon as max_items or max_bytes is reached, so at most
+    window pages beyond the limit are ever held in memory.
+    """
+    items: list = []
+    size = 0
+    pages = 0
+    stop_reason = "exhausted"
+
+    def collect(page: Any) -> bool:
+        nonlocal size, pages
+        pages += 1
+        for item in page_items(page, scheme.items_key):
+            if max_items is not None and len(items) >= max_items:
+                return False
+            if max_bytes is not None:
+                item_size = len(json.dumps(item, separators=(",", ":"), default=str))
+                if size + item_size > max_bytes:
+                    return False
+                size += item_size
+            items.append(item)
+        return max_items is None or len(items) < max_items
+
+    if not collect(first_page):
+        stop_reason = "limit"
+    else:
+        if scheme.kind in ("page", "offset"):
+            page_size = len(page_items(first_page, scheme.items_key))
+            following = _numbered_pages(fetch_page, scheme, endpoint, params, max_pages, window, page_size)
+        else:
+            following = _linked_pages(fetch_page, first_page, scheme, endpoint, params, max_pages)
+        try:
+            async for page in following:
+                if not collect(page):
+                    stop_reason = "limit"
+                    break
+            else:
+                if pages >= max_pages:
+                    stop_reason = "max_pages"
+        finally:
+            await following.aclose()
+
+    merged = dict(first_page)
+    merged[scheme.items_key] = items
+    # Continuation tokens of the first page no longer describe the merged result
+    for key in (scheme.cursor_key,) + NEXT_LINK_KEYS:
+        merged.pop(key, None)
+    merged["auto_pagination"] = {
+        "scheme": scheme.kind,
+        "pages_fetched": pages,
+        "items": len(items),
+        "stop_reason": stop_reason,
+    }
+    return merged
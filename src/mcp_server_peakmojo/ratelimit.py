@@ -0,0 +1,165 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+from .endpoints import EndpointRules
+
+# Values of X-RateLimit-Reset above this are epoch timestamps rather than delays
+_EPOCH_THRESHOLD = 1_000_000_000
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header, given in seconds or as an HTTP date, into a delay"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def parse_rate_limit_reset(headers: Mapping[str, str]) -> Optional[float]:
+    """Get the delay until an exhausted X-RateLimit window resets, if the headers say it is exhausted"""
+    remaining = headers.get("X-RateLimit-Remaining")
+    reset = headers.get("X-RateLimit-Reset")
+    if remaining is None or reset is None:
+        return None
+    try:
+        if float(remaining) > 0:
+            return None
+        reset_value = float(reset)
+    except ValueError:
+        return None
+    if reset_value > _EPOCH_THRESHOLD:
+        return max(0.0, reset_value - time.time())
+    return max(0.0, reset_value)
+
+
+class TokenBucket:
+    """Token bucket that queues callers in arrival order until a token is available.
+
+    A bucket without a rate never runs out of tokens but still honours
+    pauses requested by the upstream API.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        self.rate = rate or None
+        self.burst = burst or (max(1.0, rate) if rate else None)
+        self.tokens = self.burst or 0.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waiting = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def pause(self, delay: float) -> None:
+        """Hold every caller back for delay seconds"""
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+
+    async def acquire(self) -> float:
+        """Wait for a token and return how long that took"""
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now < self.paused_until:
+                        delay = self.paused_until - now
+                    elif not self.rate:
+                        break
+                    elif self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    else:
+                        delay = (1 - self.tokens) / self.rate
+                    await asyncio.sleep(delay)
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self.throttled += 1
+            self.total_wait += waited
+        return waited
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the current state of the bucket"""
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self.tokens, 2) if self.rate else None,
+            "paused_for": round(max(0.0, self.paused_until - now), 3),
+            "waiting": self.waiting,
+            "throttled": self.throttled,
+            "total_wait_seconds": round(self.total_wait, 3),
+        }
+
+
+class RateLimiter:
+    """Client-side rate limiting with a global bucket and optional per-endpoint buckets.
+
+    Endpoint limits are given as ``{pattern: rate}`` or
+    ``{pattern: {"rate": rate, "burst": burst}}``. A request takes a token
+    from its endpoint's bucket, if any, and from the global bucket.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None, endpoint_limits: Optional[Dict[str, Any]] = None):
+        self.global_bucket = TokenBucket(rate, burst)
+        buckets = {}
+        for pattern, limit in (endpoint_limits or {}).items():
+            if isinstance(limit, dict):
+                buckets[pattern] = TokenBucket(limit.get("rate"), limit.get("burst"))
+            else:
+                buckets[pattern] = TokenBucket(limit)
+        self._buckets = buckets
+        self._rules = EndpointRules({pattern: pattern for pattern in buckets})
+
+    def buckets_for(self, endpoint: str) -> List[TokenBucket]:
+        """Get the buckets a request to endpoint draws from, most specific first"""
+        pattern = self._rules.get(endpoint)
+        if pattern is None:
+            return [self.global_bucket]
+        return [self._buckets[pattern], self.global_bucket]
+
+    async def acquire(self, endpoint: str) -> float:
+        """Wait until a request to endpoint is allowed and return the time spent waiting"""
+        waited = 0.0
+        for bucket in self.buckets_for(endpoint):
+            waited += await bucket.acquire()
+        return waited
+
+    def observe(self, endpoint: str, status_code: int, headers: Mapping[str, str]) -> Optional[float]:
+        """Apply the rate limit signals of a response and return the pause it requested, if any"""
+        delay = None
+        if status_code == 429 or status_code == 503:
+            delay = parse_retry_after(headers.get("Retry-After"))
+            if delay is None and status_code == 429:
+                delay = 1.0
+        reset = parse_rate_limit_reset(headers)
+        if reset is not None:
+            delay = max(delay or 0.0, reset)
+        if delay:
+            self.buckets_for(endpoint)[0].pause(delay)
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the state of every bucket"""
+        return {
+            "global": self.global_bucket.stats(),
+            "endpoints": {pattern: bucket.stats() for pattern, bucket in self._buckets.items()},
+        }
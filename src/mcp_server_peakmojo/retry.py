@@ -0,0 +1,45 @@
+import random
+from typing import Any, Dict, FrozenSet, Optional
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUSES = frozenset({502, 503, 504})
+
+
+class RetryPolicy:
+    """Decide whether and when a failed request is attempted again.
+
+    Delays follow capped exponential backoff with full jitter. Only
+    idempotent methods are retried, unless the caller made the request safe
+    to repeat by supplying an idempotency key.
+    """
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.2, max_delay: float = 5.0, deadline: float = 30.0, retry_statuses: FrozenSet[int] = RETRYABLE_STATUSES):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_statuses = retry_statuses
+        self.retries: Dict[str, int] = {}
+        self.exhausted = 0
+
+    def is_retryable(self, method: str, idempotency_key: Optional[str] = None) -> bool:
+        """Check whether a request may safely be sent more than once"""
+        return method.upper() in IDEMPOTENT_METHODS or bool(idempotency_key)
+
+    def backoff(self, attempt: int) -> float:
+        """Get the delay before retry number attempt (starting at 1)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def record_retry(self, reason: str) -> None:
+        self.retries[reason] = self.retries.get(reason, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the policy settings and retry counters"""
+        return {
+            "attempts": self.attempts,
+            "base_delay": self.base_delay,
+            "max_delay": self.max_delay,
+            "deadline": self.deadline,
+            "retries": dict(self.retries),
+            "exhausted": self.exhausted,
+        }
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+MUTATION = "mutation"
+DEFAULT_WEIGHTS = {INTERACTIVE: 8.0, MUTATION: 4.0, BULK: 1.0}
+
+
+class _PriorityClass:
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.waiters: Deque[Tuple[float, "asyncio.Future[None]", float]] = deque()
+        self.last_finish = 0.0
+        self.max_depth = 0
+        self.dispatched = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class FairQueue:
+    """Weighted fair queue of callers waiting for a slot.
+
+    Every waiter gets a virtual finish tag of one request divided by its
+    class weight, counted from the later of the current virtual time and
+    the class's previous tag. Waiters are released in tag order, so while
+    all classes are backlogged each gets slots in proportion to its weight
+    and no class starves. Unknown classes have weight 1.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.virtual_time = 0.0
+        self._classes: Dict[str, _PriorityClass] = {}
+
+    def _class(self, name: str) -> _PriorityClass:
+        priority_class = self._classes.get(name)
+        if priority_class is None:
+            priority_class = self._classes[name] = _PriorityClass(max(self.weights.get(name, 1.0), 0.001))
+        return priority_class
+
+    def __len__(self) -> int:
+        return sum(len(priority_class.waiters) for priority_class in self._classes.values())
+
+    def push(self, name: str) -> "asyncio.Future[None]":
+        """Queue a waiter of the given class and return the future resolved when it is released"""
+        priority_class = self._class(name)
+        tag = max(self.virtual_time, priority_class.last_finish) + 1 / priority_class.weight
+        priority_class.last_finish = tag
+        waiter = asyncio.get_running_loop().create_future()
+        priority_class.waiters.append((tag, waiter, time.monotonic()))
+        priority_class.max_depth = max(priority_class.max_depth, len(priority_class.waiters))
+        return waiter
+
+    def pop(self) -> Optional["asyncio.Future[None]"]:
+        """Take the pending waiter with the earliest finish tag"""
+        while True:
+            candidates = [priority_class for priority_class in self._classes.values() if priority_class.waiters]
+            if not candidates:
+                return None
+            priority_class = min(candidates, key=lambda candidate: candidate.waiters[0][0])
+            tag, waiter, enqueued = priority_class.waiters.popleft()
+            if waiter.done():
+                continue
+            self.virtual_time = tag
+            waited = time.monotonic() - enqueued
+            priority_class.dispatched += 1
+            priority_class.total_wait += waited
+            priority_class.max_wait = max(priority_class.max_wait, waited)
+            return waiter
+
+    def remove(self, waiter: "asyncio.Future[None]") -> None:
+        """Forget a waiter that gave up"""
+        for priority_class in self._classes.values():
+            for entry in priority_class.waiters:
+                if entry[1] is waiter:
+                    priority_class.waiters.remove(entry)
+                    return
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and wait times per class"""
+        stats = {}
+        for name in sorted(self._classes, key=lambda name: -self._classes[name].weight):
+            priority_class = self._classes[name]
+            stats[name] = {
+                "weight": priority_class.weight,
+                "queue_depth": len(priority_class.waiters),
+                "max_queue_depth": priority_class.max_depth,
+                "waited": priority_class.dispatched,
+                "avg_wait_ms": round(priority_class.total_wait / priority_class.dispatched * 1000, 1) if priority_class.dispatched else 0.0,
+                "max_wait_ms": round(priority_class.max_wait * 1000, 1),
+            }
+        return stats
@@ -0,0 +1,118 @@
+import json
+import math
+import re
+from typing import Any, Callable, Dict, List
+
+import yaml
+
+try:
+    from yaml import CDumper as YamlDumper
+except ImportError:
+    from yaml import Dumper as YamlDumper
+
+# Strings that can be emitted as plain YAML scalars without quoting
+_PLAIN = re.compile(r"[A-Za-z][A-Za-z0-9_./\- ]*\Z")
+_RESERVED = {"y", "n", "yes", "no", "true", "false", "on", "off", "null"}
+# Anything outside printable ASCII/Unicode that must be escaped in a quoted scalar
+_ESCAPE = re.compile(r'["\\\x00-\x1f\x7f-\x9f\u2028\u2029\ud800-\udfff\ufeff\ufffe\uffff]')
+_ESCAPES = {'"': '\\"', "\\": "\\\\", "\n": "\\n", "\t": "\\t", "\r": "\\r"}
+
+
+def _escape(match: "re.Match[str]") -> str:
+    char = match.group()
+    return _ESCAPES.get(char) or f"\\u{ord(char):04x}"
+
+
+def _scalar(value: Any) -> str:
+    """Render a JSON scalar as a YAML scalar that loads back to the same value"""
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ".nan"
+        if math.isinf(value):
+            return ".inf" if value > 0 else "-.inf"
+        text = repr(value)
+        # YAML 1.1 floats need a dot, e.g. 1e+16 must be written 1.0e+16
+        if "." not in text:
+            text = text.replace("e", ".0e") if "e" in text else text + ".0"
+        return text
+    if not isinstance(value, str):
+        value = str(value)
+    if _PLAIN.match(value) and not value.endswith(" ") and value.lower() not in _RESERVED:
+        return value
+    return '"' + _ESCAPE.sub(_escape, value) + '"'
+
+
+def _emit(value: Any, indent: int, lines: List[str]) -> None:
+    """Append block-style YAML lines for a non-empty dict or list"""
+    pad = " " * indent
+    if isinstance(value, dict):
+        for key, item in value.items():
+            key = _scalar(key if isinstance(key, str) else str(key))
+            if isinstance(item, (dict, list)) and item:
+                lines.append(f"{pad}{key}:")
+                # Like PyYAML, sequences under a key are not indented further
+                _emit(item, indent + 2 if isinstance(item, dict) else indent, lines)
+            else:
+                lines.append(f"{pad}{key}: {_flow(item)}")
+        return
+    for item in value:
+        if isinstance(item, (dict, list)) and item:
+            start = len(lines)
+            _emit(item, indent + 2, lines)
+            lines[start] = f"{pad}- {lines[start][indent + 2:]}"
+        else:
+            lines.append(f"{pad}- {_flow(item)}")
+
+
+def _flow(value: Any) -> str:
+    if isinstance(value, dict):
+        return "{}"
+    if isinstance(value, list):
+        return "[]"
+    return _scalar(value)
+
+
+def dump_fast_yaml(value: Any) -> str:
+    """Emit YAML for JSON-shaped data without going through PyYAML's generic emitter"""
+    if isinstance(value, (dict, list)) and value:
+        lines: List[str] = []
+        _emit(value, 0, lines)
+        lines.append("")
+        return "\n".join(lines)
+    return _flow(value) + "\n"
+
+
+def dump_yaml(value: Any) -> str:
+    """Emit YAML with PyYAML, using the libyaml C emitter when it is available"""
+    return yaml.dump(value, Dumper=YamlDumper, sort_keys=False, allow_unicode=True)
+
+
+def dump_json(value: Any) -> str:
+    """Emit compact JSON"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+SERIALIZERS: Dict[str, Callable[[Any], str]] = {
+    "yaml": dump_yaml,
+    "yaml-fast": dump_fast_yaml,
+    "json": dump_json,
+}
+
+OUTPUT_FORMATS = tuple(SERIALIZERS)
+
+
+def serialize(value: Any, output_format: str = "yaml") -> str:
+    """Serialize a decoded response in the requested output format"""
+    try:
+        serializer = SERIALIZERS[output_format]
+    except KeyError:
+        raise ValueError(f"Unknown output format: {output_format}. Expected one of {', '.join(OUTPUT_FORMATS)}")
+    return serializer(value)
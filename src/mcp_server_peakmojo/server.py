@@ -1,11 +1,13 @@
 import argparse
+import asyncio
 import json
 import logging
 import os
-from typing import Any, Dict, Optional
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Tuple
 
-import requests
-import yaml
+import httpx
 from mcp.server import Server
 import mcp.types as types
 import mcp.server.stdio
@@ -13,27 +15,225 @@ from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions
 from pydantic import AnyUrl
 
+from .breaker import CircuitBreakers, CircuitOpenError
+from .cache import NEGATIVE_CACHE_STATUSES, STALE_IF_ERROR, STALE_WHILE_REVALIDATE, CacheEntry, ResponseCache, canonical_key, key_endpoint
+from .compression import CompressionStats, accept_encoding, compress_body
+from .concurrency import OVERLOAD_STATUSES, ConcurrencyLimiter
+from .disk_cache import DiskCache, credentials_fingerprint
+from .endpoints import EndpointRules
+from .hedging import Hedger
+from .invalidation import InvalidationRules
+from .latency import LatencyTracker
+from .pagination import detect_pagination, paginate
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .scheduling import BULK, INTERACTIVE, MUTATION
+from .serializers import OUTPUT_FORMATS, serialize
+from .shaping import BYTES_PER_TOKEN, Projection, shape_to_budget
+from .singleflight import SingleFlight
+from .timeouts import AdaptiveTimeout, RequestTimeout, TimeoutOverride, TimeoutPolicy
+from .streaming import StreamingJsonDecoder, open_spill_file, remove_old_spill_files
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("peakmojo_server")
 
 
-def parse_arguments() -> argparse.Namespace:
+MAX_BATCH_SIZE = 100
+
+TIMEOUT_PROPERTY = {
+    "type": ["number", "object"],
+    "description": "Timeout in seconds for the whole request including retries, or an object with connect, read and total seconds. Overrides the server's configured timeouts.",
+    "properties": {
+        "connect": {"type": "number", "exclusiveMinimum": 0},
+        "read": {"type": "number", "exclusiveMinimum": 0},
+        "total": {"type": "number", "exclusiveMinimum": 0}
+    }
+}
+
+OUTPUT_BUDGET_PROPERTIES = {
+    "max_output_tokens": {
+        "type": "integer",
+        "description": "Token budget of the response. Larger responses are shrunk by dropping nulls, cutting arrays and eliding long strings, and report what was cut under 'shaping'.",
+        "minimum": 50
+    },
+    "max_bytes": {
+        "type": "integer",
+        "description": "Byte budget of the response, applied like max_output_tokens",
+        "minimum": 200
+    },
+}
+
+
+def normalize_endpoint(endpoint: str) -> str:
+    """Ensure endpoint starts with /"""
+    if not endpoint.startswith("/"):
+        endpoint = f"/{endpoint}"
+    return endpoint
+
+
+def describe_error(error: Exception) -> str:
+    """Describe an exception, falling back to its type for errors without a message"""
+    return str(error) or type(error).__name__
+
+
+def cache_info(entry: CacheEntry, **extra: Any) -> Dict[str, Any]:
+    """Describe the age of a response served from the cache"""
+    return {"age_seconds": round(entry.age, 1), "stale": not entry.is_fresh, **extra}
+
+
+def json_argument(value: str) -> Any:
+    """Parse a JSON-encoded command line switch"""
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError as e:
+        raise argparse.ArgumentTypeError(f"invalid JSON value: {e}")
+
+
+def parse_arguments(argv: Optional[list[str]] = None) -> argparse.Namespace:
     """Use argparse to allow values to be set as CLI switches
     or environment variables
     """
     parser = argparse.ArgumentParser(description='PeakMojo Server')
     parser.add_argument('--api-key', help='PeakMojo API key', default=os.environ.get('PEAKMOJO_API_KEY'))
     parser.add_argument('--base-url', help='PeakMojo API base URL', default=os.environ.get('PEAKMOJO_BASE_URL', 'https://api.staging.readymojo.com'))
-    return parser.parse_args()
+    parser.add_argument('--max-connections', type=int, help='Maximum number of pooled HTTP connections', default=int(os.environ.get('PEAKMOJO_MAX_CONNECTIONS', '100')))
+    parser.add_argument('--max-keepalive-connections', type=int, help='Maximum number of idle keep-alive connections', default=int(os.environ.get('PEAKMOJO_MAX_KEEPALIVE_CONNECTIONS', '20')))
+    parser.add_argument('--keepalive-expiry', type=float, help='Seconds an idle keep-alive connection is kept open', default=float(os.environ.get('PEAKMOJO_KEEPALIVE_EXPIRY', '30')))
+    parser.add_argument('--max-connections-per-host', type=int, help='Maximum number of in-flight requests per upstream host', default=int(os.environ.get('PEAKMOJO_MAX_CONNECTIONS_PER_HOST', '0')) or None)
+    parser.add_argument('--cache-ttl', type=float, help='Default seconds a GET response is cached (0 disables caching)', default=float(os.environ.get('PEAKMOJO_CACHE_TTL', '60')))
+    parser.add_argument('--cache-ttls', type=json_argument, help='JSON object mapping endpoint patterns to cache TTLs in seconds', default=json.loads(os.environ.get('PEAKMOJO_CACHE_TTLS', '{}')))
+    parser.add_argument('--stale-while-revalidate', type=float, help='Seconds past expiry a cached GET response is served at once while it is refreshed in the background', default=float(os.environ.get('PEAKMOJO_STALE_WHILE_REVALIDATE', '0')))
+    parser.add_argument('--stale-if-error', type=float, help='Seconds past expiry a cached GET response is served when the API fails or times out', default=float(os.environ.get('PEAKMOJO_STALE_IF_ERROR', '3600')))
+    parser.add_argument('--stale-limits', type=json_argument, help='JSON object mapping endpoint patterns to {"while_revalidate": ..., "if_error": ...} seconds, or to one limit for both', default=json.loads(os.environ.get('PEAKMOJO_STALE_LIMITS', '{}')))
+    parser.add_argument('--invalidation-rules', type=json_argument, help='JSON object mapping mutation endpoint patterns to lists of GET endpoint patterns whose cached responses they invalidate', default=json.loads(os.environ.get('PEAKMOJO_INVALIDATION_RULES', '{}')))
+    parser.add_argument('--negative-cache-ttl', type=float, help='Seconds a 404, 410 or other deterministic client error of a GET request is cached (0 disables negative caching)', default=float(os.environ.get('PEAKMOJO_NEGATIVE_CACHE_TTL', '30')))
+    parser.add_argument('--cache-max-bytes', type=int, help='Maximum total size of cached responses in bytes', default=int(os.environ.get('PEAKMOJO_CACHE_MAX_BYTES', str(32 * 1024 * 1024))))
+    parser.add_argument('--disk-cache', help='Path of an SQLite database caching GET responses across restarts, shared by every server process using it (disabled by default)', default=os.environ.get('PEAKMOJO_DISK_CACHE'))
+    parser.add_argument('--disk-cache-max-bytes', type=int, help='Maximum total size of compressed responses in the disk cache in bytes', default=int(os.environ.get('PEAKMOJO_DISK_CACHE_MAX_BYTES', str(256 * 1024 * 1024))))
+    parser.add_argument('--batch-concurrency', type=int, help='Default number of batch requests run concurrently', default=int(os.environ.get('PEAKMOJO_BATCH_CONCURRENCY', '8')))
+    parser.add_argument('--pagination-window', type=int, help='Number of pages prefetched concurrently when auto-paginating', default=int(os.environ.get('PEAKMOJO_PAGINATION_WINDOW', '4')))
+    parser.add_argument('--pagination-max-pages', type=int, help='Maximum number of pages fetched by one auto-paginated request', default=int(os.environ.get('PEAKMOJO_PAGINATION_MAX_PAGES', '50')))
+    parser.add_argument('--spill-dir', help='Directory for items spilled from streamed responses (defaults to the system temp directory)', default=os.environ.get('PEAKMOJO_SPILL_DIR'))
+    parser.add_argument('--spill-max-age', type=float, help='Seconds a spill file is kept before it is deleted (0 keeps spill files)', default=float(os.environ.get('PEAKMOJO_SPILL_MAX_AGE', '86400')))
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, help='Default format of tool responses', default=os.environ.get('PEAKMOJO_OUTPUT_FORMAT', 'yaml'))
+    parser.add_argument('--field-params', type=json_argument, help='JSON object mapping endpoint patterns to the query parameter the API uses for field selection', default=json.loads(os.environ.get('PEAKMOJO_FIELD_PARAMS', '{}')))
+    parser.add_argument('--max-output-tokens', type=int, help='Default token budget of a tool response', default=int(os.environ.get('PEAKMOJO_MAX_OUTPUT_TOKENS', '0')) or None)
+    parser.add_argument('--max-output-bytes', type=int, help='Default byte budget of a tool response', default=int(os.environ.get('PEAKMOJO_MAX_OUTPUT_BYTES', '0')) or None)
+    parser.add_argument('--rate-limit', type=float, help='Maximum requests per second to the API (0 for unlimited)', default=float(os.environ.get('PEAKMOJO_RATE_LIMIT', '0')))
+    parser.add_argument('--rate-limit-burst', type=float, help='Number of requests allowed in a burst above the rate limit', default=float(os.environ.get('PEAKMOJO_RATE_LIMIT_BURST', '0')) or None)
+    parser.add_argument('--rate-limits', type=json_argument, help='JSON object mapping endpoint patterns to requests per second, or to {"rate": ..., "burst": ...}', default=json.loads(os.environ.get('PEAKMOJO_RATE_LIMITS', '{}')))
+    parser.add_argument('--rate-limit-retries', type=int, help='Times a rate limited (HTTP 429) request is queued and resent', default=int(os.environ.get('PEAKMOJO_RATE_LIMIT_RETRIES', '3')))
+    parser.add_argument('--retry-attempts', type=int, help='Maximum attempts for a request failing with a connection error or HTTP 502/503/504', default=int(os.environ.get('PEAKMOJO_RETRY_ATTEMPTS', '3')))
+    parser.add_argument('--retry-base-delay', type=float, help='Base delay in seconds of the exponential retry backoff', default=float(os.environ.get('PEAKMOJO_RETRY_BASE_DELAY', '0.2')))
+    parser.add_argument('--retry-max-delay', type=float, help='Maximum delay in seconds between retries', default=float(os.environ.get('PEAKMOJO_RETRY_MAX_DELAY', '5')))
+    parser.add_argument('--retry-deadline', type=float, help='Seconds after which a request is no longer retried', default=float(os.environ.get('PEAKMOJO_RETRY_DEADLINE', '30')))
+    parser.add_argument('--breaker-failure-rate', type=float, help='Share of failed or slow recent calls that opens an endpoint group\'s circuit', default=float(os.environ.get('PEAKMOJO_BREAKER_FAILURE_RATE', '0.5')))
+    parser.add_argument('--breaker-slow-call-seconds', type=float, help='Calls slower than this count as failures for the circuit breaker', default=float(os.environ.get('PEAKMOJO_BREAKER_SLOW_CALL_SECONDS', '0')) or None)
+    parser.add_argument('--breaker-window', type=int, help='Number of recent calls per endpoint group the failure rate is computed over', default=int(os.environ.get('PEAKMOJO_BREAKER_WINDOW', '20')))
+    parser.add_argument('--breaker-min-calls', type=int, help='Minimum recent calls before a circuit can open', default=int(os.environ.get('PEAKMOJO_BREAKER_MIN_CALLS', '5')))
+    parser.add_argument('--breaker-open-seconds', type=float, help='Seconds an open circuit fails fast before letting a probe call through', default=float(os.environ.get('PEAKMOJO_BREAKER_OPEN_SECONDS', '30')))
+    parser.add_argument('--breaker-groups', type=json_argument, help='JSON list of endpoint patterns sharing a circuit breaker (defaults to the first two path segments)', default=json.loads(os.environ.get('PEAKMOJO_BREAKER_GROUPS', '[]')))
+    parser.add_argument('--connect-timeout', type=float, help='Seconds to wait for a connection to the API', default=float(os.environ.get('PEAKMOJO_CONNECT_TIMEOUT', '5')))
+    parser.add_argument('--read-timeout', type=float, help='Seconds to wait for data from the API', default=float(os.environ.get('PEAKMOJO_READ_TIMEOUT', '30')))
+    parser.add_argument('--total-timeout', type=float, help='Seconds a request may take in total, including queueing and retries', default=float(os.environ.get('PEAKMOJO_TOTAL_TIMEOUT', '60')))
+    parser.add_argument('--timeouts', type=json_argument, help='JSON object mapping endpoint patterns to {"connect": ..., "read": ..., "total": ...} seconds, or to a total', default=json.loads(os.environ.get('PEAKMOJO_TIMEOUTS', '{}')))
+    parser.add_argument('--adaptive-timeouts', action=argparse.BooleanOptionalAction, help='Derive read timeouts from observed endpoint latency', default=os.environ.get('PEAKMOJO_ADAPTIVE_TIMEOUTS', '1') not in ('0', 'false', 'no'))
+    parser.add_argument('--adaptive-timeout-factor', type=float, help='Multiple of the observed p99 latency used as adaptive read timeout', default=float(os.environ.get('PEAKMOJO_ADAPTIVE_TIMEOUT_FACTOR', '3')))
+    parser.add_argument('--adaptive-timeout-floor', type=float, help='Minimum adaptive read timeout in seconds', default=float(os.environ.get('PEAKMOJO_ADAPTIVE_TIMEOUT_FLOOR', '1')))
+    parser.add_argument('--adaptive-timeout-ceiling', type=float, help='Maximum adaptive read timeout in seconds', default=float(os.environ.get('PEAKMOJO_ADAPTIVE_TIMEOUT_CEILING', '60')))
+    parser.add_argument('--hedging', action=argparse.BooleanOptionalAction, help='Send a second copy of GET requests slower than the endpoint\'s p95 latency', default=os.environ.get('PEAKMOJO_HEDGING', '0') not in ('0', 'false', 'no'))
+    parser.add_argument('--hedge-budget', type=float, help='Maximum share of extra requests sent as hedges', default=float(os.environ.get('PEAKMOJO_HEDGE_BUDGET', '0.05')))
+    parser.add_argument('--adaptive-concurrency', action=argparse.BooleanOptionalAction, help='Adapt the number of in-flight API requests to upstream latency and overload responses', default=os.environ.get('PEAKMOJO_ADAPTIVE_CONCURRENCY', '1') not in ('0', 'false', 'no'))
+    parser.add_argument('--concurrency-limit', type=int, help='Initial number of in-flight API requests allowed by the adaptive limiter', default=int(os.environ.get('PEAKMOJO_CONCURRENCY_LIMIT', '20')))
+    parser.add_argument('--concurrency-max-limit', type=int, help='Maximum number of in-flight API requests the adaptive limiter grows to (defaults to --max-connections)', default=int(os.environ.get('PEAKMOJO_CONCURRENCY_MAX_LIMIT', '0')) or None)
+    parser.add_argument('--priority-weights', type=json_argument, help='JSON object mapping request classes (interactive, bulk, mutation) to their share of queued API slots', default=json.loads(os.environ.get('PEAKMOJO_PRIORITY_WEIGHTS', '{}')))
+    parser.add_argument('--request-compression-min-bytes', type=int, help='Gzip JSON request bodies of at least this many bytes (0 disables request compression)', default=int(os.environ.get('PEAKMOJO_REQUEST_COMPRESSION_MIN_BYTES', '0')))
+    parser.add_argument('--http2', action=argparse.BooleanOptionalAction, help='Multiplex requests over HTTP/2 connections when the API supports it (requires the h2 package)', default=os.environ.get('PEAKMOJO_HTTP2', '0') not in ('0', 'false', 'no'))
+    parser.add_argument('--http2-prior-knowledge', action=argparse.BooleanOptionalAction, help='Speak HTTP/2 without negotiation, for http:// base URLs of servers known to support it', default=os.environ.get('PEAKMOJO_HTTP2_PRIOR_KNOWLEDGE', '0') not in ('0', 'false', 'no'))
+    return parser.parse_args(argv)
 
 
 class PeakMojoQuerier:
-    def __init__(self):
+    def __init__(self, args: Optional[argparse.Namespace] = None):
         """Initialize PeakMojo API client"""
-        args = parse_arguments()
+        args = args or parse_arguments()
         self.api_key = args.api_key
         self.base_url = args.base_url
+        self.limits = httpx.Limits(
+            max_connections=args.max_connections,
+            max_keepalive_connections=args.max_keepalive_connections,
+            keepalive_expiry=args.keepalive_expiry,
+        )
+        self.max_connections_per_host = args.max_connections_per_host
+        self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._pool_counters = {"requests": 0, "connections_opened": 0}
+        self._http_versions: Dict[str, int] = {}
+        self.http2 = (args.http2 or args.http2_prior_knowledge) and self._h2_available()
+        self.http2_prior_knowledge = self.http2 and args.http2_prior_knowledge
+        self.compression = CompressionStats()
+        self.request_compression_min_bytes = args.request_compression_min_bytes
+        self.cache = ResponseCache(
+            max_bytes=args.cache_max_bytes,
+            default_ttl=args.cache_ttl,
+            ttls=args.cache_ttls,
+            stale_while_revalidate=args.stale_while_revalidate,
+            stale_if_error=args.stale_if_error,
+            stale_limits=args.stale_limits,
+            negative_ttl=args.negative_cache_ttl,
+        )
+        self.disk_cache = self._open_disk_cache(args) if args.disk_cache else None
+        self._background: set = set()
+        self.invalidation_rules = InvalidationRules(args.invalidation_rules)
+        self._single_flight = SingleFlight()
+        self.batch_concurrency = args.batch_concurrency
+        self.pagination_window = args.pagination_window
+        self.pagination_max_pages = args.pagination_max_pages
+        self.spill_dir = args.spill_dir
+        self.spill_max_age = args.spill_max_age
+        self.output_format = args.output_format
+        self.field_params = EndpointRules(args.field_params)
+        self.max_output_tokens = args.max_output_tokens
+        self.max_output_bytes = args.max_output_bytes
+        self.rate_limiter = RateLimiter(args.rate_limit, args.rate_limit_burst, args.rate_limits)
+        self.rate_limit_retries = args.rate_limit_retries
+        self.retry_policy = RetryPolicy(
+            attempts=args.retry_attempts,
+            base_delay=args.retry_base_delay,
+            max_delay=args.retry_max_delay,
+            deadline=args.retry_deadline,
+        )
+        self.latency = LatencyTracker()
+        adaptive_timeout = None
+        if args.adaptive_timeouts:
+            adaptive_timeout = AdaptiveTimeout(
+                self.latency,
+                factor=args.adaptive_timeout_factor,
+                floor=args.adaptive_timeout_floor,
+                ceiling=args.adaptive_timeout_ceiling,
+            )
+        self.timeouts = TimeoutPolicy(
+            RequestTimeout(connect=args.connect_timeout, read=args.read_timeout, total=args.total_timeout),
+            args.timeouts,
+            adaptive=adaptive_timeout,
+        )
+        self.hedger = Hedger(args.hedge_budget) if args.hedging else None
+        self.concurrency = ConcurrencyLimiter(
+            initial=args.concurrency_limit,
+            max_limit=args.concurrency_max_limit or args.max_connections,
+            adaptive=args.adaptive_concurrency,
+            weights=args.priority_weights,
+        )
+        self.breakers = CircuitBreakers(
+            groups=args.breaker_groups,
+            failure_rate=args.breaker_failure_rate,
+            slow_call_seconds=args.breaker_slow_call_seconds,
+            window=args.breaker_window,
+            min_calls=args.breaker_min_calls,
+            open_seconds=args.breaker_open_seconds,
+        )
 
         if not self.api_key:
             logger.warning("PeakMojo API key not found in environment variables")
@@ -42,37 +242,691 @@ class PeakMojoQuerier:
         """Get request headers with Bearer token"""
         return {
             'Authorization': f'Bearer {self.api_key}',
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            'Accept-Encoding': accept_encoding(),
         }
 
-    def execute_query(self, endpoint: str, method: str = 'GET', data: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-        """Execute a query against the PeakMojo API and return response in YAML format"""
+    @staticmethod
+    def _h2_available() -> bool:
+        """Check that the h2 package needed for HTTP/2 is installed"""
         try:
-            url = f"{self.base_url}{endpoint}"
-            headers = self.get_headers()
-            
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=data if data else None,
-                params=params if params else None
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 requested but the h2 package is not installed, falling back to HTTP/1.1")
+            return False
+        return True
+
+    def _open_disk_cache(self, args: argparse.Namespace) -> Optional[DiskCache]:
+        """Open the shared disk cache, keeping expired responses as long as they may be served stale"""
+        stale_limits = [
+            limit
+            for limits in args.stale_limits.values()
+            for limit in (limits.values() if isinstance(limits, dict) else [limits])
+            if limit
+        ]
+        try:
+            return DiskCache(
+                args.disk_cache,
+                credentials_fingerprint(self.base_url, self.api_key),
+                max_bytes=args.disk_cache_max_bytes,
+                keep_expired=max([args.stale_while_revalidate, args.stale_if_error, *stale_limits]),
             )
-            
-            # Raise an exception for bad status codes
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Cannot open disk cache {args.disk_cache}, continuing without it: {e}")
+            return None
+
+    def get_client(self) -> httpx.AsyncClient:
+        """Get the shared pooled HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._transport = httpx.AsyncHTTPTransport(
+                limits=self.limits,
+                http1=not self.http2_prior_knowledge,
+                http2=self.http2,
+            )
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.get_headers(),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client and its connection pool, and the disk cache"""
+        for task in list(self._background):
+            task.cancel()
+        if self.disk_cache is not None:
+            await self.disk_cache.close()
+            self.disk_cache = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._transport = None
+
+    def _host_slot(self, url: httpx.URL) -> Optional[asyncio.Semaphore]:
+        """Get the semaphore limiting in-flight requests to the given host"""
+        if not self.max_connections_per_host:
+            return None
+        host = url.host or ""
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._host_slots[host]
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """Count new connections reported by the transport"""
+        if event_name == "connection.connect_tcp.complete":
+            self._pool_counters["connections_opened"] += 1
+
+    async def _send(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None, stream: bool = False, headers: Optional[Dict[str, str]] = None, timeout: Optional[httpx.Timeout] = None) -> httpx.Response:
+        """Send a single request through the connection pool
+
+        With stream=True the body is left unread and the caller must close the response.
+        Large request bodies are gzipped unless the endpoint rejected that before.
+        """
+        client = self.get_client()
+        content = None
+        if data and self.request_compression_min_bytes and self.compression.accepts_compressed_body(endpoint):
+            body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            if len(body) >= self.request_compression_min_bytes:
+                content = compress_body(body)
+                headers = {**(headers or {}), "Content-Encoding": "gzip"}
+        request = client.build_request(
+            method=method,
+            url=endpoint,
+            json=data if data and content is None else None,
+            content=content,
+            params=params if params else None,
+            headers=headers,
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            extensions={"trace": self._trace},
+        )
+        self._pool_counters["requests"] += 1
+        slot = self._host_slot(request.url)
+        if slot is None:
+            response = await client.send(request, stream=stream)
+        else:
+            async with slot:
+                response = await client.send(request, stream=stream)
+
+        self._http_versions[response.http_version] = self._http_versions.get(response.http_version, 0) + 1
+        if content is not None:
+            if response.status_code == 415:
+                logger.info(f"{endpoint} does not accept compressed request bodies, resending uncompressed")
+                self.compression.reject_compressed_body(endpoint)
+                await response.aclose()
+                headers = {key: value for key, value in headers.items() if key != "Content-Encoding"}
+                return await self._send(method, endpoint, data, params, stream, headers or None, timeout)
+            self.compression.record_request(endpoint, len(body), len(content))
+        if not stream:
+            self.compression.record_response(endpoint, response.headers.get("Content-Encoding"), response.num_bytes_downloaded, len(response.content))
+        return response
+
+    async def _send_hedged(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None, stream: bool = False, headers: Optional[Dict[str, str]] = None, timeout: Optional[httpx.Timeout] = None) -> httpx.Response:
+        """Send a request, hedging GETs that take longer than the endpoint's p95 latency"""
+        if self.hedger is None or method.upper() != "GET":
+            return await self._send(method, endpoint, data, params, stream, headers, timeout)
+        sent = 0
+
+        async def call() -> httpx.Response:
+            nonlocal sent
+            sent += 1
+            if sent > 1:
+                # Hedges count against the rate limits like any other request
+                await self.rate_limiter.acquire(endpoint)
+            return await self._send(method, endpoint, data, params, stream, headers, timeout)
+
+        async def discard(response: httpx.Response) -> None:
+            await response.aclose()
+
+        return await self.hedger.run(call, self.latency.percentile(method, endpoint, 0.95), discard)
+
+    async def _send_limited(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None, stream: bool = False, headers: Optional[Dict[str, str]] = None, timeout: Optional[httpx.Timeout] = None, priority: str = INTERACTIVE) -> Tuple[httpx.Response, float]:
+        """Send a request once the concurrency limit allows it, queueing by priority class
+
+        Returns the response and the seconds spent waiting for a free slot.
+        """
+        async with self.concurrency.slot(method, endpoint, priority) as outcome:
+            response = await self._send_hedged(method, endpoint, data, params, stream, headers, timeout)
+            outcome.overloaded = response.status_code in OVERLOAD_STATUSES
+            return response, outcome.waited
+
+    async def _request(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None, stream: bool = False, idempotency_key: Optional[str] = None, timeout: TimeoutOverride = None, priority: str = INTERACTIVE, headers: Optional[Dict[str, str]] = None, enforce_total: bool = True) -> httpx.Response:
+        """Send a request, aborting it once its total timeout has passed
+
+        With enforce_total=False the total timeout is left to the callers
+        waiting on the request, e.g. every caller of a coalesced GET.
+        """
+        timeouts = self.timeouts.resolve(method, endpoint, timeout)
+        deadline = time.monotonic() + timeouts.total if timeouts.total and enforce_total else None
+        attempts = self._attempt(method, endpoint, data, params, stream, idempotency_key, timeouts, deadline, priority, headers)
+        if deadline is None:
+            return await attempts
+        try:
+            return await asyncio.wait_for(attempts, timeouts.total)
+        except asyncio.TimeoutError:
+            raise httpx.TimeoutException(f"{method} {endpoint} did not complete within {timeouts.total:g}s")
+
+    async def _attempt(self, method: str, endpoint: str, data: Optional[Dict[str, Any]], params: Optional[Dict[str, Any]], stream: bool, idempotency_key: Optional[str], timeouts: RequestTimeout, deadline: Optional[float], priority: str = INTERACTIVE, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """Send a request within the rate limits, retrying transient failures
+
+        A 429 response is queued and resent once the rate limiter allows it.
+        Connection errors and 502/503/504 responses are retried with backoff,
+        but only for idempotent methods or requests carrying an idempotency key.
+        No retry is started past the policy's deadline. Calls to an endpoint
+        group whose circuit is open fail fast with CircuitOpenError.
+        """
+        policy = self.retry_policy
+        breaker = self.breakers.for_endpoint(endpoint)
+        retryable = policy.is_retryable(method, idempotency_key)
+        if idempotency_key:
+            headers = {**(headers or {}), "Idempotency-Key": idempotency_key}
+        if deadline is None or time.monotonic() + policy.deadline < deadline:
+            deadline = time.monotonic() + policy.deadline
+        attempt = 1
+        rate_limited = 0
+        while True:
+            await self.rate_limiter.acquire(endpoint)
+            breaker.before_call()
+            started = time.monotonic()
+            try:
+                response, queued = await self._send_limited(
+                    method,
+                    endpoint,
+                    data=data,
+                    params=params,
+                    stream=stream,
+                    headers=headers,
+                    timeout=httpx.Timeout(timeouts.read, connect=timeouts.connect),
+                    priority=priority,
+                )
+            except httpx.TransportError as e:
+                elapsed = time.monotonic() - started
+                breaker.record(False, elapsed)
+                if isinstance(e, httpx.ReadTimeout):
+                    # A lower bound of the real latency, lets adaptive timeouts grow
+                    self.latency.record(method, endpoint, elapsed)
+                delay = policy.backoff(attempt)
+                if not retryable or attempt >= policy.attempts or time.monotonic() + delay > deadline:
+                    if retryable:
+                        policy.exhausted += 1
+                    raise
+                policy.record_retry(type(e).__name__)
+                logger.info(f"{type(e).__name__} on {method} {endpoint}, retrying in {delay:.2f}s (attempt {attempt + 1} of {policy.attempts})")
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+            elapsed = time.monotonic() - started - queued
+            breaker.record(response.status_code < 500, elapsed)
+            if response.status_code < 500:
+                self.latency.record(method, endpoint, elapsed)
+
+            pause = self.rate_limiter.observe(endpoint, response.status_code, response.headers)
+            if response.status_code == 429:
+                if rate_limited >= self.rate_limit_retries or time.monotonic() + (pause or 0) > deadline:
+                    return response
+                rate_limited += 1
+                policy.record_retry("429")
+                await response.aclose()
+                logger.info(f"Rate limited on {endpoint}, retrying after {pause or 0:.1f}s (attempt {rate_limited} of {self.rate_limit_retries})")
+                continue
+
+            if response.status_code not in policy.retry_statuses or not retryable:
+                return response
+            delay = max(policy.backoff(attempt), pause or 0)
+            if attempt >= policy.attempts or time.monotonic() + delay > deadline:
+                policy.exhausted += 1
+                return response
+            policy.record_retry(str(response.status_code))
+            await response.aclose()
+            logger.info(f"HTTP {response.status_code} on {method} {endpoint}, retrying in {delay:.2f}s (attempt {attempt + 1} of {policy.attempts})")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool usage statistics"""
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(pool.connections) if pool is not None else []
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "max_connections_per_host": self.max_connections_per_host,
+            "http2": self.http2,
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "requests": self._pool_counters["requests"],
+            "connections_opened": self._pool_counters["connections_opened"],
+            "responses_by_http_version": dict(self._http_versions),
+        }
+
+    def format_response(self, value: Any, output_format: Optional[str] = None, max_tokens: Optional[int] = None, max_bytes: Optional[int] = None, cache: Optional[Dict[str, Any]] = None) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        """Serialize a value as tool output, shaped to fit the output budget
+
+        The server's default format and budget apply unless given. Cache
+        information is returned as a separate text block after the value,
+        counted against the budget; it is left out if the budget has no room
+        for it.
+        """
+        output_format = output_format or self.output_format
+        max_tokens = max_tokens or self.max_output_tokens
+        max_bytes = max_bytes or self.max_output_bytes
+        block = serialize({"cache": cache}, output_format) if cache is not None else None
+        if block is not None and (max_tokens is not None or max_bytes is not None):
+            limits = [limit for limit in (max_bytes, int(max_tokens * BYTES_PER_TOKEN) if max_tokens is not None else None) if limit is not None]
+            remaining = min(limits) - len(block.encode("utf-8"))
+            if remaining > 0:
+                max_tokens, max_bytes = None, remaining
+            else:
+                block = None
+        text = shape_to_budget(
+            value,
+            lambda shaped: serialize(shaped, output_format),
+            max_tokens=max_tokens,
+            max_bytes=max_bytes,
+        )
+        content = [types.TextContent(type="text", text=text)]
+        if block is not None:
+            content.append(types.TextContent(type="text", text=block))
+        return content
+
+    def latency_stats(self) -> Dict[str, Any]:
+        """Get latency percentiles and the adaptive read timeout of every method and endpoint template"""
+        stats = self.latency.stats()
+        if self.timeouts.adaptive is not None:
+            for key, entry in stats.items():
+                method, template = key.split(" ", 1)
+                read_timeout = self.timeouts.adaptive.read_timeout(method, template)
+                entry["adaptive_read_timeout"] = round(read_timeout, 2) if read_timeout is not None else None
+        return stats
+
+    def get_diagnostics(self) -> Dict[str, Any]:
+        """Get a snapshot of the querier's internal state"""
+        return {
+            "connection_pool": self.pool_stats(),
+            "response_cache": self.cache.stats(),
+            "disk_cache": self.disk_cache.stats() if self.disk_cache is not None else {"enabled": False},
+            "request_coalescing": self._single_flight.stats(),
+            "rate_limits": self.rate_limiter.stats(),
+            "retries": self.retry_policy.stats(),
+            "circuit_breakers": self.breakers.stats(),
+            "latency": self.latency_stats(),
+            "concurrency": self.concurrency.stats(),
+            "hedging": self.hedger.stats() if self.hedger is not None else {"enabled": False},
+            "compression": self.compression.stats(),
+        }
+
+    async def fetch(self, endpoint: str, method: str = 'GET', data: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None, idempotency_key: Optional[str] = None, timeout: TimeoutOverride = None, priority: str = INTERACTIVE) -> Any:
+        """Fetch and decode a JSON response, serving GET requests from the cache when possible"""
+        value, _ = await self.fetch_with_cache_info(endpoint, method, data, params, idempotency_key, timeout, priority)
+        return value
+
+    async def fetch_with_cache_info(self, endpoint: str, method: str = 'GET', data: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None, idempotency_key: Optional[str] = None, timeout: TimeoutOverride = None, priority: str = INTERACTIVE) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """Fetch and decode a JSON response like fetch
+
+        Also returns, for responses served from the cache, a description of
+        their age and whether they are stale, kept apart from the API data.
+        """
+        method = method.upper()
+        if method != 'GET':
+            try:
+                response = await self._request(method, endpoint, data=data, params=params, idempotency_key=idempotency_key, timeout=timeout, priority=MUTATION)
+            finally:
+                # Even a failed mutation may have been applied
+                self.invalidate(endpoint)
             response.raise_for_status()
+            return response.json(), None
+
+        key = canonical_key(method, endpoint, params)
+        entry = self.cache.get(key)
+        if entry is None and self.disk_cache is not None:
+            entry = await self._load_from_disk(key)
+        if entry is not None and entry.is_negative:
+            # Raise the cached client error the same way a fresh one would be
+            entry.value.raise_for_status()
+        if entry is not None:
+            return entry.value, cache_info(entry)
+
+        stale = self.cache.get_stale(key, endpoint, STALE_WHILE_REVALIDATE)
+        if stale is not None:
+            self._refresh_in_background(key, endpoint, params)
+            return stale.value, cache_info(stale, revalidating=True)
+
+        # Identical concurrent GETs share a single upstream request, sent with
+        # the endpoint's connect and read timeouts; each caller waits for it
+        # no longer than its own total timeout
+        total = self.timeouts.resolve(method, endpoint, timeout).total
+        try:
+            return await self._single_flight.do(key, lambda: self._fetch_and_cache(key, endpoint, params, priority), timeout=total or None)
+        except asyncio.TimeoutError:
+            return self._serve_stale_on_error(key, endpoint, httpx.TimeoutException(f"GET {endpoint} did not complete within {total:g}s"))
+
+    def invalidate(self, endpoint: str) -> int:
+        """Drop cached GET responses made stale by a mutation of endpoint"""
+        targets = self.invalidation_rules.targets(endpoint)
+
+        def affected(cached_endpoint: str) -> bool:
+            return self.invalidation_rules.affects(endpoint, cached_endpoint, targets)
+
+        # GETs already in flight may return pre-mutation data, later callers must not join them
+        self._single_flight.detach(lambda key: affected(key_endpoint(key)))
+        dropped = self.cache.invalidate(affected)
+        if self.disk_cache is not None:
+            self.disk_cache.invalidate(affected)
+        if dropped:
+            logger.info(f"Mutation of {endpoint} invalidated {dropped} cached responses")
+        return dropped
+
+    async def _load_from_disk(self, key: str) -> Optional[CacheEntry]:
+        """Copy a response stored on disk, by this or another process, into memory and return it if fresh
+
+        Expired responses are copied too, to be served stale or revalidated,
+        unless memory holds a more recent one.
+        """
+        invalidations = self.cache.invalidations
+        stored = await self.disk_cache.get(key)
+        if stored is None or self.cache.invalidations != invalidations:
+            return None
+        current = self.cache.peek(key)
+        if current is not None and current.age <= stored.age:
+            return None
+        entry = self.cache.set(
+            key,
+            stored.value,
+            size=stored.size,
+            ttl=stored.ttl,
+            etag=stored.etag,
+            last_modified=stored.last_modified,
+            age=stored.age,
+        )
+        return entry if entry is not None and entry.is_fresh else None
+
+    def _store(self, key: str, value: Any, size: int, ttl: float, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Cache a successful response in memory and on disk"""
+        entry = self.cache.set(key, value, size=size, ttl=ttl, etag=etag, last_modified=last_modified)
+        if entry is not None and self.disk_cache is not None:
+            self.disk_cache.set(key, value, ttl=entry.ttl, etag=etag, last_modified=last_modified)
+
+    def _refresh_in_background(self, key: str, endpoint: str, params: Optional[Dict[str, Any]]) -> None:
+        """Refresh a cache entry without making the caller wait for it"""
+        total = self.timeouts.resolve('GET', endpoint).total
+        task = asyncio.ensure_future(self._single_flight.do(key, lambda: self._fetch_and_cache(key, endpoint, params, BULK), timeout=total or None))
+        self._background.add(task)
+
+        def done(task: asyncio.Future) -> None:
+            self._background.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(f"Background refresh of {endpoint} failed: {describe_error(task.exception())}")
+
+        task.add_done_callback(done)
+
+    def _serve_stale_on_error(self, key: str, endpoint: str, error: Exception) -> Tuple[Any, Dict[str, Any]]:
+        """Serve an expired entry in place of a failed request, or raise the error"""
+        stale = self.cache.get_stale(key, endpoint, STALE_IF_ERROR)
+        if stale is None:
+            raise error
+        if isinstance(error, httpx.HTTPStatusError):
+            reason = f"HTTP {error.response.status_code}"
+        else:
+            reason = describe_error(error)
+        logger.warning(f"{reason} from {endpoint}, serving cached response from {stale.age:.0f}s ago")
+        return stale.value, cache_info(stale, error=reason)
+
+    async def _fetch_and_cache(self, key: str, endpoint: str, params: Optional[Dict[str, Any]], priority: str = INTERACTIVE) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """Fetch a GET response from upstream and store it in the cache
+
+        An expired entry with validators is revalidated with a conditional
+        request, and kept without decoding anything when the API answers 304.
+        When the API fails, times out or its circuit is open, a recently
+        expired entry is served instead. Returns the value and, for values
+        served from the cache, a description of the cached entry.
+        """
+        stale = self.cache.peek(key)
+        conditional = stale.conditional_headers() if stale is not None else {}
+        invalidations = self.cache.invalidations
+        try:
+            response = await self._request('GET', endpoint, params=params, priority=priority, headers=conditional or None, enforce_total=False)
+        except (httpx.TransportError, CircuitOpenError) as e:
+            return self._serve_stale_on_error(key, endpoint, e)
+        if response.status_code >= 500:
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                return self._serve_stale_on_error(key, endpoint, e)
+        if conditional:
+            self.cache.record_revalidation(response.status_code == 304)
+        # Responses to requests overtaken by a mutation may predate it and are not cached
+        current = self.cache.invalidations == invalidations
+        if response.status_code == 304 and stale is not None:
+            if current:
+                self._store(
+                    key,
+                    stale.value,
+                    size=stale.size,
+                    ttl=self.cache.ttl_for(endpoint),
+                    etag=response.headers.get("ETag", stale.etag),
+                    last_modified=response.headers.get("Last-Modified", stale.last_modified),
+                )
+            return stale.value, None
+        if response.status_code in NEGATIVE_CACHE_STATUSES and current:
+            self.cache.set(
+                key,
+                response,
+                size=len(response.content),
+                ttl=self.cache.negative_ttl_for(endpoint),
+                status_code=response.status_code,
+            )
+        response.raise_for_status()
+        json_response = response.json()
+        if not current:
+            return json_response, None
+        self._store(
+            key,
+            json_response,
+            size=len(response.content),
+            ttl=self.cache.ttl_for(endpoint),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        return json_response, None
+
+    async def fetch_all_pages(self, endpoint: str, params: Optional[Dict[str, Any]] = None, max_items: Optional[int] = None, max_bytes: Optional[int] = None, max_pages: Optional[int] = None, timeout: TimeoutOverride = None) -> Any:
+        """Fetch a list endpoint and follow its pagination, merging every page into one response"""
+        params = params or {}
+        first_page = await self.fetch(endpoint, params=params, timeout=timeout, priority=BULK)
+        scheme = detect_pagination(first_page)
+        if scheme is None:
+            return first_page
+        return await paginate(
+            lambda page_endpoint, page_params: self.fetch(page_endpoint, params=page_params, timeout=timeout, priority=BULK),
+            first_page,
+            scheme,
+            endpoint,
+            params,
+            max_items=max_items,
+            max_bytes=max_bytes,
+            max_pages=min(max_pages or self.pagination_max_pages, self.pagination_max_pages),
+            window=self.pagination_window,
+        )
+
+    async def fetch_streamed(self, endpoint: str, params: Optional[Dict[str, Any]] = None, max_items: Optional[int] = None, spill: bool = False, projection: Optional[Projection] = None, timeout: TimeoutOverride = None) -> Any:
+        """Fetch a GET response, decoding its list items incrementally as the body arrives.
+
+        Items beyond max_items are either dropped, in which case the rest of
+        the body is never read, or spilled to a JSON Lines file. When the
+        body is cut short, envelope fields that follow the items are not
+        returned. Streamed responses bypass the response cache since they
+        may be partial. A projection is applied to each item as it is
+        decoded, so unselected fields are never kept.
+        """
+        decoder = StreamingJsonDecoder()
+        kept: list = []
+        received = 0
+        spill_file = None
+        truncated = False
+        transform = None
+        decoded_bytes = 0
+
+        def consume(items: list) -> bool:
+            nonlocal received, spill_file, transform
+            if items and transform is None:
+                transform = projection.item_transform(decoder.envelope.keys(), decoder.items_key) if projection else (lambda item: item)
+            for item in items:
+                item = transform(item)
+                received += 1
+                if max_items is None or len(kept) < max_items:
+                    kept.append(item)
+                elif spill:
+                    if spill_file is None:
+                        if self.spill_max_age:
+                            remove_old_spill_files(self.spill_dir, self.spill_max_age)
+                        spill_file = open_spill_file(self.spill_dir)
+                    spill_file.write(json.dumps(item, ensure_ascii=False) + "\n")
+                else:
+                    return False
+            return True
+
+        response = await self._request('GET', endpoint, params=params, stream=True, timeout=timeout, priority=BULK)
+        completed = False
+        try:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                decoded_bytes += len(chunk)
+                if not consume(decoder.feed(chunk)):
+                    truncated = True
+                    break
+            else:
+                consume(decoder.close())
+            completed = True
+        finally:
+            self.compression.record_response(endpoint, response.headers.get("Content-Encoding"), response.num_bytes_downloaded, decoded_bytes)
+            await response.aclose()
+            if spill_file is not None:
+                spill_file.close()
+                # A failed request returns no path to the file, so nobody would ever read it
+                if not completed:
+                    os.unlink(spill_file.name)
+
+        if not truncated and spill_file is None:
+            return decoder.result(kept)
+
+        summary: Dict[str, Any] = {"items_returned": len(kept), "truncated": truncated}
+        if spill_file is not None:
+            summary["items_spilled"] = received - len(kept)
+            summary["spill_file"] = spill_file.name
+        result = decoder.result(kept)
+        if not isinstance(result, dict):
+            result = {"items": result}
+        result["streaming"] = summary
+        return result
+
+    def pushdown_fields(self, endpoint: str, params: Optional[Dict[str, Any]], projection: Projection) -> Optional[Dict[str, Any]]:
+        """Add the API's own field selection parameter for endpoints configured to support one"""
+        param = self.field_params.get(endpoint)
+        if not param or (params and param in params):
+            return params
+        value = projection.pushdown_value()
+        if value is None:
+            return params
+        return {**(params or {}), param: value}
+
+    async def execute_query(self, endpoint: str, method: str = 'GET', data: Optional[Dict[str, Any]] = None, params: Optional[Dict[str, Any]] = None, paginate: Optional[Dict[str, Any]] = None, stream: Optional[Dict[str, Any]] = None, output_format: Optional[str] = None, fields: Optional[list[str]] = None, max_output_tokens: Optional[int] = None, max_bytes: Optional[int] = None, idempotency_key: Optional[str] = None, timeout: TimeoutOverride = None) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        """Execute a query against the PeakMojo API and return response in YAML (or the requested) format"""
+        if output_format is not None and output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        projection = Projection(fields) if fields else None
+        if projection is not None and method.upper() == 'GET':
+            params = self.pushdown_fields(endpoint, params, projection)
+        cache = None
+        try:
+            if paginate is not None and stream is not None:
+                raise ValueError("paginate and stream cannot be combined")
+            if stream is not None and method.upper() == 'GET':
+                json_response = await self.fetch_streamed(
+                    endpoint,
+                    params=params,
+                    max_items=stream.get("max_items"),
+                    spill=stream.get("spill", False),
+                    projection=projection,
+                    timeout=timeout,
+                )
+            elif paginate is not None and method.upper() == 'GET':
+                json_response = await self.fetch_all_pages(
+                    endpoint,
+                    params=params,
+                    max_items=paginate.get("max_items"),
+                    max_bytes=paginate.get("max_bytes"),
+                    max_pages=paginate.get("max_pages"),
+                    timeout=timeout,
+                )
+            else:
+                json_response, cache = await self.fetch_with_cache_info(endpoint, method=method, data=data, params=params, idempotency_key=idempotency_key, timeout=timeout)
+
+            # Prune unwanted fields before serializing
+            if projection is not None:
+                json_response = projection.apply(json_response)
             
-            # Parse JSON response and convert to YAML
-            json_response = response.json()
-            yaml_response = yaml.dump(json_response, sort_keys=False, allow_unicode=True)
-            
-            return [types.TextContent(type="text", text=yaml_response)]
+            return self.format_response(json_response, output_format, max_tokens=max_output_tokens, max_bytes=max_bytes, cache=cache)
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request error: {str(e)}")
-            error_response = {"error": str(e)}
-            yaml_response = yaml.dump(error_response, sort_keys=False, allow_unicode=True)
-            return [types.TextContent(type="text", text=yaml_response)]
+        except httpx.HTTPError as e:
+            logger.error(f"Request error: {describe_error(e)}")
+            error_response = {"error": describe_error(e)}
+            return self.format_response(error_response, output_format)
+
+    async def _execute_batch_item(self, index: int, item: Dict[str, Any], timeout: TimeoutOverride = None) -> Dict[str, Any]:
+        """Execute one request of a batch and describe its outcome"""
+        endpoint = normalize_endpoint(item.get("endpoint", ""))
+        method = item.get("method", "GET").upper()
+        result: Dict[str, Any] = {"index": index, "endpoint": endpoint, "method": method, "status": "ok"}
+        started = time.perf_counter()
+        try:
+            result["response"], cache = await self.fetch_with_cache_info(endpoint, method=method, data=item.get("data"), params=item.get("params"), idempotency_key=item.get("idempotency_key"), timeout=timeout, priority=BULK)
+            if cache is not None:
+                result["cache"] = cache
+        except httpx.HTTPStatusError as e:
+            result["status"] = "error"
+            result["status_code"] = e.response.status_code
+            result["error"] = describe_error(e)
+        except (httpx.HTTPError, ValueError) as e:
+            result["status"] = "error"
+            result["error"] = describe_error(e)
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    async def execute_batch(self, requests: list[Dict[str, Any]], max_concurrency: Optional[int] = None, output_format: Optional[str] = None, max_output_tokens: Optional[int] = None, max_bytes: Optional[int] = None, timeout: TimeoutOverride = None) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        """Execute several requests concurrently and return a combined YAML (or the requested format) result"""
+        if output_format is not None and output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        if len(requests) > MAX_BATCH_SIZE:
+            raise ValueError(f"Batch contains {len(requests)} requests, the maximum is {MAX_BATCH_SIZE}")
+        for index, item in enumerate(requests):
+            if not item.get("endpoint"):
+                raise ValueError(f"Batch request {index} is missing an endpoint")
+
+        concurrency = max(1, min(max_concurrency or self.batch_concurrency, self.limits.max_connections or MAX_BATCH_SIZE))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._execute_batch_item(index, item, timeout=timeout)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(run(index, item) for index, item in enumerate(requests)))
+        succeeded = sum(1 for result in results if result["status"] == "ok")
+        batch_response = {
+            "summary": {
+                "total": len(results),
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+                "concurrency": concurrency,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            },
+            "results": results,
+        }
+        return self.format_response(batch_response, output_format, max_tokens=max_output_tokens, max_bytes=max_bytes)
 
 
 async def main():
@@ -102,7 +956,7 @@ async def main():
         if path != "api":
             raise ValueError(f"Unknown resource path: {path}")
             
-        return peakmojo.execute_query("/")
+        return await peakmojo.execute_query("/")
 
     @server.list_tools()
     async def handle_list_tools() -> list[types.Tool]:
@@ -133,11 +987,129 @@ async def main():
                             "type": "object",
                             "description": "Request body for POST/PUT/PATCH requests",
                             "additionalProperties": True
-                        }
+                        },
+                        "paginate": {
+                            "type": ["boolean", "object"],
+                            "description": "Follow the pagination of a GET list endpoint and return all pages merged into one response. Pass true, or an object with limits to stop early.",
+                            "properties": {
+                                "max_items": {
+                                    "type": "integer",
+                                    "description": "Stop once this many items have been collected",
+                                    "minimum": 1
+                                },
+                                "max_bytes": {
+                                    "type": "integer",
+                                    "description": "Stop once the collected items reach this many bytes of JSON",
+                                    "minimum": 1
+                                },
+                                "max_pages": {
+                                    "type": "integer",
+                                    "description": "Stop after this many pages",
+                                    "minimum": 1
+                                }
+                            }
+                        },
+                        "stream": {
+                            "type": ["boolean", "object"],
+                            "description": "Decode a large GET list response incrementally. Pass true, or an object to keep only the first items.",
+                            "properties": {
+                                "max_items": {
+                                    "type": "integer",
+                                    "description": "Return only this many list items and stop reading the response",
+                                    "minimum": 0
+                                },
+                                "spill": {
+                                    "type": "boolean",
+                                    "description": "Write items beyond max_items to a JSON Lines file on the server instead of dropping them",
+                                    "default": False
+                                }
+                            }
+                        },
+                        "idempotency_key": {
+                            "type": "string",
+                            "description": "Unique key sent as the Idempotency-Key header. Lets POST/PATCH requests be retried safely after transient failures."
+                        },
+                        "timeout": TIMEOUT_PROPERTY,
+                        "fields": {
+                            "type": "array",
+                            "description": "Only return these fields, as dotted paths (e.g. 'id', 'data.name', 'profile.email') or JSONPath (e.g. '$.data[*].id'). For list responses, paths are resolved against each item.",
+                            "items": {"type": "string"}
+                        },
+                        "output_format": {
+                            "type": "string",
+                            "description": "Format of the returned response. Defaults to the server's configured format.",
+                            "enum": list(OUTPUT_FORMATS)
+                        },
+                        **OUTPUT_BUDGET_PROPERTIES
                     },
                     "required": ["endpoint"]
                 },
             ),
+            types.Tool(
+                name="peakmojo_batch_api_requests",
+                description="Make several PeakMojo API requests in parallel with a single call. Returns one combined result with the status, timing and response of every request.",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "requests": {
+                            "type": "array",
+                            "description": "The API requests to make",
+                            "maxItems": MAX_BATCH_SIZE,
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "endpoint": {
+                                        "type": "string",
+                                        "description": "The API endpoint to call (e.g. '/v1/users/123')"
+                                    },
+                                    "method": {
+                                        "type": "string",
+                                        "description": "HTTP method",
+                                        "default": "GET",
+                                        "enum": ["GET", "POST", "PUT", "DELETE", "PATCH"]
+                                    },
+                                    "params": {
+                                        "type": "object",
+                                        "description": "Query parameters to include in the request",
+                                        "additionalProperties": True
+                                    },
+                                    "data": {
+                                        "type": "object",
+                                        "description": "Request body for POST/PUT/PATCH requests",
+                                        "additionalProperties": True
+                                    },
+                                    "idempotency_key": {
+                                        "type": "string",
+                                        "description": "Unique key sent as the Idempotency-Key header, allowing POST/PATCH retries"
+                                    }
+                                },
+                                "required": ["endpoint"]
+                            }
+                        },
+                        "timeout": TIMEOUT_PROPERTY,
+                        "max_concurrency": {
+                            "type": "integer",
+                            "description": "Maximum number of requests in flight at once",
+                            "minimum": 1
+                        },
+                        "output_format": {
+                            "type": "string",
+                            "description": "Format of the combined result. Defaults to the server's configured format.",
+                            "enum": list(OUTPUT_FORMATS)
+                        },
+                        **OUTPUT_BUDGET_PROPERTIES
+                    },
+                    "required": ["requests"]
+                },
+            ),
+            types.Tool(
+                name="peakmojo_get_diagnostics",
+                description="Get internal diagnostics of the PeakMojo server, such as connection pool usage, response cache hit rates, rate limits and circuit breaker states.",
+                inputSchema={
+                    "type": "object",
+                    "properties": {},
+                },
+            ),
         ]
 
     @server.call_tool()
@@ -149,39 +1121,67 @@ async def main():
                 method = inputs.get("method", "GET")
                 params = inputs.get("params", {})
                 data = inputs.get("data", {})
-                
-                # Ensure endpoint starts with /
-                if not endpoint.startswith("/"):
-                    endpoint = f"/{endpoint}"
+                paginate = inputs.get("paginate")
+                if paginate is True:
+                    paginate = {}
+                elif paginate is False:
+                    paginate = None
+                stream = inputs.get("stream")
+                if stream is True:
+                    stream = {}
+                elif stream is False:
+                    stream = None
                     
-                return peakmojo.execute_query(
-                    endpoint=endpoint,
+                return await peakmojo.execute_query(
+                    endpoint=normalize_endpoint(endpoint),
                     method=method,
                     params=params,
-                    data=data
+                    data=data,
+                    paginate=paginate,
+                    stream=stream,
+                    output_format=inputs.get("output_format"),
+                    fields=inputs.get("fields"),
+                    max_output_tokens=inputs.get("max_output_tokens"),
+                    max_bytes=inputs.get("max_bytes"),
+                    idempotency_key=inputs.get("idempotency_key"),
+                    timeout=inputs.get("timeout")
+                )
+            elif name == "peakmojo_batch_api_requests":
+                return await peakmojo.execute_batch(
+                    inputs["requests"],
+                    max_concurrency=inputs.get("max_concurrency"),
+                    output_format=inputs.get("output_format"),
+                    max_output_tokens=inputs.get("max_output_tokens"),
+                    max_bytes=inputs.get("max_bytes"),
+                    timeout=inputs.get("timeout"),
                 )
+            elif name == "peakmojo_get_diagnostics":
+                diagnostics = peakmojo.get_diagnostics()
+                return peakmojo.format_response(diagnostics)
             else:
                 raise ValueError(f"Unknown tool: {name}")
                 
         except Exception as e:
             logger.error(f"Error invoking tool {name}: {str(e)}")
-            return [types.TextContent(type="text", text=yaml.dump({"error": str(e)}, sort_keys=False, allow_unicode=True))]
-
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        logger.info("Server running with stdio transport")
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="peakmojo",
-                server_version="0.1.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
+            return peakmojo.format_response({"error": str(e)})
+
+    try:
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            logger.info("Server running with stdio transport")
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="peakmojo",
+                    server_version="0.1.0",
+                    capabilities=server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={},
+                    ),
                 ),
-            ),
-        )
+            )
+    finally:
+        await peakmojo.aclose()
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
@@ -0,0 +1,304 @@
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from .pagination import ITEM_KEYS
+
+Segment = Union[str, int]
+
+_LEAF = object()
+# Top-level keys the server adds to describe how a response was produced
+METADATA_KEYS = ("auto_pagination", "streaming")
+_TOKEN = re.compile(r"""\.?([^.\[\]]+)|\[(\*|\d+|'[^']*'|"[^"]*")\]""")
+
+
+def parse_path(path: str) -> List[Segment]:
+    """Parse a dotted path (``data.name``) or JSONPath subset (``$.data[*].name``) into segments"""
+    text = path.strip()
+    if text.startswith("$"):
+        text = text[1:]
+    segments: List[Segment] = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"Invalid field path: {path}")
+        name, bracket = match.groups()
+        if name is not None:
+            segments.append(name)
+        elif bracket == "*":
+            segments.append("*")
+        elif bracket.isdigit():
+            segments.append(int(bracket))
+        else:
+            segments.append(bracket[1:-1])
+        position = match.end()
+    if not segments:
+        raise ValueError(f"Invalid field path: {path}")
+    return segments
+
+
+def _merge(first: Any, second: Any) -> Any:
+    if first is None:
+        return second
+    if second is None:
+        return first
+    if first is _LEAF or second is _LEAF:
+        return _LEAF
+    merged = dict(first)
+    for key, value in second.items():
+        merged[key] = _merge(merged.get(key), value)
+    return merged
+
+
+def _build_tree(paths: Iterable[List[Segment]]) -> Dict[Segment, Any]:
+    tree: Dict[Segment, Any] = {}
+    for path in paths:
+        node = tree
+        for segment in path[:-1]:
+            child = node.get(segment)
+            if child is _LEAF:
+                break
+            node = node.setdefault(segment, {})
+        else:
+            node[path[-1]] = _LEAF
+    return tree
+
+
+def _element_tree(tree: Dict[Segment, Any], index: Optional[int]) -> Any:
+    """Get the subtree applying to a list element; names apply to every element"""
+    named = {key: value for key, value in tree.items() if isinstance(key, str) and key != "*"}
+    subtree = _merge(tree.get("*"), named or None)
+    if index is not None:
+        subtree = _merge(tree.get(index), subtree)
+    return subtree
+
+
+def _project(value: Any, tree: Any) -> Any:
+    if tree is _LEAF:
+        return value
+    if isinstance(value, list):
+        projected = []
+        for index, item in enumerate(value):
+            subtree = _element_tree(tree, index)
+            if subtree is not None:
+                projected.append(_project(item, subtree))
+        return projected
+    if isinstance(value, dict):
+        wildcard = tree.get("*")
+        projected = {}
+        for key, item in value.items():
+            subtree = _merge(tree.get(key), wildcard)
+            if subtree is not None:
+                projected[key] = _project(item, subtree)
+        return projected
+    return value
+
+
+def items_key_of(document: Any) -> Optional[str]:
+    """Get the envelope key holding a list response's items"""
+    if isinstance(document, dict):
+        return next((key for key in ITEM_KEYS if isinstance(document.get(key), list)), None)
+    return None
+
+
+class Projection:
+    """Select a subset of fields from a decoded response.
+
+    Paths are resolved against the top level of the response. For list
+    envelopes such as ``{"data": [...], "page": 1}``, a path whose first
+    segment is not a top-level key is resolved against each item instead,
+    so ``["id", "name", "page"]`` keeps the id and name of every item plus
+    the page number.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = list(fields)
+        self.paths = [parse_path(field) for field in self.fields]
+
+    def _tree(self, top_level_keys: Iterable[str], items_key: Optional[str]) -> Dict[Segment, Any]:
+        keys = set(top_level_keys)
+        paths = []
+        for path in self.paths:
+            if items_key is not None and path[0] != "*" and path[0] not in keys:
+                path = [items_key] + path
+            paths.append(path)
+        return _build_tree(paths)
+
+    def apply(self, document: Any) -> Any:
+        """Project a whole response"""
+        items_key = items_key_of(document)
+        keys = document.keys() if isinstance(document, dict) else ()
+        tree = self._tree(keys, items_key)
+        if isinstance(document, dict):
+            for key in METADATA_KEYS:
+                tree[key] = _LEAF
+        return _project(document, tree)
+
+    def item_transform(self, envelope_keys: Iterable[str], items_key: Optional[str]) -> Callable[[Any], Any]:
+        """Get a function projecting single items of a list response as they are decoded"""
+        tree = self._tree(list(envelope_keys) + [items_key], items_key)
+        if items_key is not None:
+            tree = tree.get(items_key)
+        if tree is None or tree is _LEAF or any(isinstance(key, int) for key in tree):
+            # Index-based selection needs the whole list, leave it to apply()
+            return lambda item: item
+        element_tree = _element_tree(tree, None)
+        return lambda item: _project(item, element_tree)
+
+    def pushdown_value(self) -> Optional[str]:
+        """Get a comma separated field list for APIs that select fields server-side"""
+        names = []
+        for path in self.paths:
+            if path[0] in ITEM_KEYS:
+                path = path[1:]
+            path = [segment for segment in path if segment != "*"]
+            if not path or any(not isinstance(segment, str) for segment in path):
+                return None
+            names.append(".".join(path))
+        return ",".join(dict.fromkeys(names)) or None
+
+
+# Average UTF-8 bytes per token for YAML/JSON output; kept low so estimates err on the high side
+BYTES_PER_TOKEN = 3.5
+# (max array items, max string length) tried in order until the output fits
+_SHAPING_LEVELS = (
+    (100, 4000),
+    (50, 1000),
+    (20, 300),
+    (10, 120),
+    (5, 60),
+    (2, 30),
+    (1, 16),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate how many tokens a serialized response costs"""
+    return int(len(text.encode("utf-8")) / BYTES_PER_TOKEN + 0.999)
+
+
+class _Shaper:
+    def __init__(self, max_items: Optional[int] = None, max_string: Optional[int] = None, max_depth: Optional[int] = None):
+        self.max_items = max_items
+        self.max_string = max_string
+        self.max_depth = max_depth
+        self.nulls_dropped = 0
+        self.arrays_truncated = 0
+        self.items_omitted = 0
+        self.strings_elided = 0
+        self.containers_collapsed = 0
+
+    def shape(self, value: Any, depth: int = 0) -> Any:
+        if isinstance(value, dict):
+            if self.max_depth is not None and depth >= self.max_depth and value:
+                self.containers_collapsed += 1
+                return f"... object with {len(value)} fields"
+            shaped = {}
+            for key, item in value.items():
+                if item is None:
+                    self.nulls_dropped += 1
+                    continue
+                shaped[key] = self.shape(item, depth + 1)
+            return shaped
+        if isinstance(value, list):
+            if self.max_depth is not None and depth >= self.max_depth and value:
+                self.containers_collapsed += 1
+                return f"... list of {len(value)} items"
+            kept = value if self.max_items is None else value[:self.max_items]
+            shaped_list = [self.shape(item, depth + 1) for item in kept]
+            if len(kept) < len(value):
+                omitted = len(value) - len(kept)
+                self.arrays_truncated += 1
+                self.items_omitted += omitted
+                shaped_list.append(f"... {omitted} more items")
+            return shaped_list
+        if isinstance(value, str) and self.max_string is not None and len(value) > self.max_string:
+            self.strings_elided += 1
+            return f"{value[:self.max_string]}... ({len(value) - self.max_string} more chars)"
+        return value
+
+    def summary(self) -> Dict[str, int]:
+        counters = {
+            "nulls_dropped": self.nulls_dropped,
+            "arrays_truncated": self.arrays_truncated,
+            "items_omitted": self.items_omitted,
+            "strings_elided": self.strings_elided,
+            "containers_collapsed": self.containers_collapsed,
+        }
+        return {key: count for key, count in counters.items() if count}
+
+
+def _with_metadata(value: Any, metadata: Dict[str, Any]) -> Any:
+    if isinstance(value, dict):
+        return {**value, "shaping": metadata}
+    return {"items": value, "shaping": metadata}
+
+
+def _longest_list(value: Any) -> int:
+    if isinstance(value, dict):
+        return max((_longest_list(item) for item in value.values()), default=0)
+    if isinstance(value, list):
+        return max([len(value)] + [_longest_list(item) for item in value])
+    return 0
+
+
+def shape_to_budget(value: Any, serialize: Callable[[Any], str], max_tokens: Optional[int] = None, max_bytes: Optional[int] = None) -> str:
+    """Serialize a response, shrinking it deterministically until it fits the budget.
+
+    Null fields are dropped first, then arrays are cut and long strings
+    elided at increasingly strict levels, then deep containers collapsed.
+    Whatever was removed is reported under a ``shaping`` key. If even that
+    does not fit, the serialized text itself is cut at the budget.
+    """
+    limits = []
+    if max_bytes is not None:
+        limits.append(max_bytes)
+    if max_tokens is not None:
+        limits.append(int(max_tokens * BYTES_PER_TOKEN))
+    if not limits:
+        return serialize(value)
+    limit = min(limits)
+
+    def fits(candidate: str) -> bool:
+        return len(candidate.encode("utf-8")) <= limit
+
+    def rough_size(candidate: Any) -> int:
+        # Compact JSON is cheap to produce and close enough to rule out hopeless attempts
+        return len(json.dumps(candidate, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8"))
+
+    size = rough_size(value)
+    text = None
+    if size <= 2 * limit:
+        text = serialize(value)
+        if fits(text):
+            return text
+        size = len(text.encode("utf-8"))
+
+    original = {"original_tokens": int(size / BYTES_PER_TOKEN + 0.999), "budget_tokens": int(limit / BYTES_PER_TOKEN)}
+    longest = _longest_list(value)
+    # Start cutting arrays near the size the budget allows, then halve
+    first_cut = int(longest * limit / size)
+    cuts = []
+    while first_cut > _SHAPING_LEVELS[0][0]:
+        cuts.append(first_cut)
+        first_cut //= 2
+    attempts = [_Shaper()] + [_Shaper(max_items, _SHAPING_LEVELS[0][1]) for max_items in cuts]
+    attempts += [_Shaper(max_items, max_string) for max_items, max_string in _SHAPING_LEVELS]
+    attempts += [_Shaper(1, 16, max_depth) for max_depth in (3, 2, 1)]
+    for shaper in attempts:
+        shaped = _with_metadata(shaper.shape(value), {**original, **shaper.summary()})
+        if rough_size(shaped) > 2 * limit:
+            continue
+        candidate = serialize(shaped)
+        if fits(candidate):
+            return candidate
+
+    # Last resort: cut the serialized text, keeping whole characters
+    if text is None:
+        text = serialize(value)
+    marker = f"\n... output cut at {limit} bytes (about {original['budget_tokens']} tokens)\n"
+    room = limit - len(marker.encode("utf-8"))
+    if room <= 0:
+        return marker.encode("utf-8")[:limit].decode("utf-8", errors="ignore")
+    return text.encode("utf-8")[:room].decode("utf-8", errors="ignore") + marker
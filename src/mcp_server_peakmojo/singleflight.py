@@ -0,0 +1,59 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class _Call:
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls sharing the same key into one execution.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same result instead of starting their own. Each
+    caller waits at most its own timeout. The shared work is cancelled only
+    once every caller waiting on it is gone.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """Run func for key, or join the run already in flight, raising asyncio.TimeoutError after timeout seconds"""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(call.task), timeout)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def detach(self, affected: Callable[[str], bool]) -> None:
+        """Let later callers of affected keys start a new run instead of joining the one in flight"""
+        for key in [key for key in self._calls if affected(key)]:
+            del self._calls[key]
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing counters"""
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,214 @@
+import codecs
+import glob
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from typing import IO, Any, Dict, Iterable, Optional
+
+from .pagination import ITEM_KEYS
+
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_STRING_END = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR_END = re.compile(r'[,\]}\s]')
+_WHITESPACE = " \t\r\n"
+
+SPILL_PREFIX = "peakmojo-"
+SPILL_SUFFIX = ".jsonl"
+
+logger = logging.getLogger("peakmojo_server")
+
+
+def open_spill_file(directory: Optional[str]) -> IO[str]:
+    """Create a JSON Lines file for spilled items, kept after it is closed"""
+    return tempfile.NamedTemporaryFile("w", dir=directory, prefix=SPILL_PREFIX, suffix=SPILL_SUFFIX, delete=False, encoding="utf-8")
+
+
+def remove_old_spill_files(directory: Optional[str], max_age: float) -> int:
+    """Delete spill files last modified more than max_age seconds ago, returning how many were deleted"""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in glob.glob(os.path.join(directory or tempfile.gettempdir(), f"{SPILL_PREFIX}*{SPILL_SUFFIX}")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+                removed += 1
+        except OSError as e:
+            # Removed by another process, or not ours to remove
+            logger.debug(f"Could not remove spill file {path}: {e}")
+    return removed
+
+
+class StreamingJsonDecoder:
+    """Incrementally decode a JSON document, yielding list items as they arrive.
+
+    The decoder understands the two shapes list endpoints return: a bare
+    top-level array, or an object envelope with the items under one of
+    ITEM_KEYS. Items are decoded one at a time as soon as they are complete,
+    so the caller can drop, transform or spill them without the whole
+    document ever being held in memory. Envelope fields other than the items
+    are decoded normally and kept in ``envelope``.
+
+    Documents of any other shape are buffered and decoded on ``close``.
+    """
+
+    def __init__(self, item_keys: Iterable[str] = ITEM_KEYS):
+        self.item_keys = tuple(item_keys)
+        self.envelope: Dict[str, Any] = {}
+        self.items_key: Optional[str] = None
+        self.is_array = False
+        self.document: Any = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._key: Optional[str] = None
+        # Resumable progress through a partially received value
+        self._scan_pos = 0
+        self._scan_depth = 0
+
+    def feed(self, chunk: bytes) -> list:
+        """Consume a chunk of the body and return the items it completed"""
+        self._buffer += self._decoder.decode(chunk)
+        return self._parse(final=False)
+
+    def close(self) -> list:
+        """Finish decoding and return any remaining items"""
+        self._buffer += self._decoder.decode(b"", final=True)
+        items = self._parse(final=True)
+        if self._state == "raw":
+            self.document = json.loads(self._buffer)
+        elif self._state != "done":
+            raise ValueError("Incomplete JSON document")
+        return items
+
+    def result(self, items: list) -> Any:
+        """Rebuild the document around the given items"""
+        if self._state == "raw":
+            return self.document
+        if self.is_array:
+            return items
+        envelope = dict(self.envelope)
+        if self.items_key is not None:
+            envelope[self.items_key] = items
+        return envelope
+
+    def _skip_whitespace(self) -> bool:
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+            self._pos += 1
+        return self._pos < len(self._buffer)
+
+    def _scan_string(self, start: int) -> Optional[int]:
+        """Get the end of the string starting at start, or None if incomplete"""
+        match = _STRING_END.match(self._buffer, start + 1)
+        return match.end() if match else None
+
+    def _scan_value(self, final: bool) -> Optional[int]:
+        """Get the end of the value starting at self._pos, or None if incomplete"""
+        buffer = self._buffer
+        char = buffer[self._pos]
+        if char == '"':
+            return self._scan_string(self._pos)
+        if char not in "[{":
+            match = _SCALAR_END.search(buffer, self._pos)
+            if match:
+                return match.start()
+            return len(buffer) if final else None
+
+        position = max(self._scan_pos, self._pos + 1)
+        depth = self._scan_depth or 1
+        while True:
+            match = _STRUCTURAL.search(buffer, position)
+            if match is None:
+                self._scan_pos, self._scan_depth = len(buffer), depth
+                return None
+            token = match.group()
+            if token == '"':
+                end = self._scan_string(match.start())
+                if end is None:
+                    self._scan_pos, self._scan_depth = match.start(), depth
+                    return None
+                position = end
+                continue
+            depth += 1 if token in "[{" else -1
+            position = match.end()
+            if depth == 0:
+                self._scan_pos, self._scan_depth = 0, 0
+                return position
+
+    def _take_value(self, final: bool) -> Any:
+        """Decode the complete value at self._pos, or return _INCOMPLETE"""
+        end = self._scan_value(final)
+        if end is None:
+            return _INCOMPLETE
+        value = json.loads(self._buffer[self._pos:end])
+        self._pos = end
+        return value
+
+    def _parse(self, final: bool) -> list:
+        items = []
+        while self._state not in ("done", "raw") and self._skip_whitespace():
+            char = self._buffer[self._pos]
+            if self._state == "start":
+                if char == "[":
+                    self.is_array = True
+                    self._state = "items"
+                    self._pos += 1
+                elif char == "{":
+                    self._state = "key"
+                    self._pos += 1
+                else:
+                    self._state = "raw"
+            elif self._state == "key":
+                if char == ",":
+                    self._pos += 1
+                elif char == "}":
+                    self._pos += 1
+                    self._state = "done"
+                else:
+                    end = self._scan_string(self._pos)
+                    if end is None:
+                        break
+                    self._key = json.loads(self._buffer[self._pos:end])
+                    self._pos = end
+                    self._state = "colon"
+            elif self._state == "colon":
+                if char != ":":
+                    raise ValueError(f"Expected ':' after key {self._key!r}")
+                self._pos += 1
+                self._state = "value"
+            elif self._state == "value":
+                if char == "[" and self.items_key is None and self._key in self.item_keys:
+                    self.items_key = self._key
+                    self._state = "items"
+                    self._pos += 1
+                    continue
+                value = self._take_value(final)
+                if value is _INCOMPLETE:
+                    break
+                self.envelope[self._key] = value
+                self._state = "key"
+            elif self._state == "items":
+                if char == ",":
+                    self._pos += 1
+                elif char == "]":
+                    self._pos += 1
+                    self._state = "done" if self.is_array else "key"
+                else:
+                    value = self._take_value(final)
+                    if value is _INCOMPLETE:
+                        break
+                    items.append(value)
+
+        if self._state != "raw" and self._pos:
+            # Drop consumed input so memory stays proportional to one item
+            self._buffer = self._buffer[self._pos:]
+            if self._scan_pos:
+                self._scan_pos -= self._pos
+            self._pos = 0
+        return items
+
+
+_INCOMPLETE = object()
@@ -0,0 +1,63 @@
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional, Union
+
+from .endpoints import EndpointRules
+from .latency import LatencyTracker
+
+TimeoutOverride = Union[None, float, int, Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class RequestTimeout:
+    connect: Optional[float] = None
+    read: Optional[float] = None
+    total: Optional[float] = None
+
+    def merged(self, override: TimeoutOverride) -> "RequestTimeout":
+        """Apply an override given as total seconds or as {connect, read, total}"""
+        if override is None:
+            return self
+        if isinstance(override, (int, float)):
+            return replace(self, total=float(override))
+        values = {field: float(override[field]) for field in ("connect", "read", "total") if override.get(field) is not None}
+        return replace(self, **values)
+
+
+class AdaptiveTimeout:
+    """Derive read timeouts from an endpoint's observed p99 latency times a safety factor"""
+
+    def __init__(self, tracker: LatencyTracker, factor: float = 3.0, floor: float = 1.0, ceiling: float = 60.0):
+        self.tracker = tracker
+        self.factor = factor
+        self.floor = floor
+        self.ceiling = ceiling
+
+    def read_timeout(self, method: str, endpoint: str) -> Optional[float]:
+        """Get the adaptive read timeout, or None until enough latency samples of the method exist"""
+        p99 = self.tracker.percentile(method, endpoint, 0.99)
+        if p99 is None:
+            return None
+        return min(self.ceiling, max(self.floor, p99 * self.factor))
+
+
+class TimeoutPolicy:
+    """Resolve the connect, read and total timeouts of a request.
+
+    Server defaults are replaced by adaptive read timeouts once a method on
+    an endpoint has enough latency history of its own. Both are overridden by the most specific
+    endpoint pattern rule, which in turn is overridden by the tool call.
+    """
+
+    def __init__(self, default: RequestTimeout, rules: Optional[Dict[str, TimeoutOverride]] = None, adaptive: Optional[AdaptiveTimeout] = None):
+        self.default = default
+        self.rules = EndpointRules(rules)
+        self.adaptive = adaptive
+
+    def resolve(self, method: str, endpoint: str, override: TimeoutOverride = None) -> RequestTimeout:
+        """Get the timeouts for a request to endpoint"""
+        timeout = self.default
+        if self.adaptive is not None:
+            read = self.adaptive.read_timeout(method, endpoint)
+            if read is not None:
+                timeout = replace(timeout, read=read)
+        return timeout.merged(self.rules.get(endpoint)).merged(override)
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from mcp_server_peakmojo.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers, CircuitOpenError
+
+
+def call(breaker, success, elapsed=0.01):
+    breaker.before_call()
+    breaker.record(success, elapsed)
+
+
+def test_opens_once_failure_rate_is_reached():
+    breaker = CircuitBreaker("/v1/users", failure_rate=0.5, min_calls=4)
+    for success in (True, False, True):
+        call(breaker, success)
+    assert breaker.state == CLOSED
+    call(breaker, False)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejected == 1
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker("/v1/users", slow_call_seconds=1.0, min_calls=2)
+    call(breaker, True, elapsed=2.0)
+    call(breaker, True, elapsed=2.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker("/v1/users", min_calls=1, open_seconds=0.05)
+    call(breaker, False)
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(True, 0.01)
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_opens_again():
+    breaker = CircuitBreaker("/v1/users", min_calls=1, open_seconds=0.05)
+    call(breaker, False)
+    time.sleep(0.06)
+    call(breaker, False)
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+
+
+def test_released_probe_frees_the_slot():
+    breaker = CircuitBreaker("/v1/users", min_calls=1, open_seconds=0.05)
+    call(breaker, False)
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+
+
+def test_endpoints_are_grouped():
+    breakers = CircuitBreakers(["/v1/users/*/certificates"], min_calls=1)
+    assert breakers.group_of("/v1/users/42?expand=1") == "/v1/users"
+    assert breakers.group_of("/v1/users/42/certificates") == "/v1/users/*/certificates"
+    assert breakers.for_endpoint("/v1/users/1") is breakers.for_endpoint("/v1/users/2")
+    call(breakers.for_endpoint("/v1/users/1"), False)
+    breakers.for_endpoint("/v1/users/42/certificates").before_call()
+    assert breakers.stats()["/v1/users"]["state"] == OPEN
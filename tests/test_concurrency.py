@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from mcp_server_peakmojo.concurrency import ConcurrencyLimiter
+from mcp_server_peakmojo.scheduling import BULK, INTERACTIVE, MUTATION, FairQueue
+
+
+def test_fair_queue_releases_by_weight():
+    async def run():
+        queue = FairQueue()
+        waiters = {name: [queue.push(name) for _ in range(8)] for name in (BULK, INTERACTIVE)}
+        order = []
+        for _ in range(9):
+            waiter = queue.pop()
+            order.append(next(name for name, futures in waiters.items() if waiter in futures))
+        return order
+
+    # Interactive has eight times the weight of bulk, but bulk is not starved
+    order = asyncio.run(run())
+    assert order.count(INTERACTIVE) == 8
+    assert order.count(BULK) == 1
+
+
+def test_fair_queue_skips_removed_and_cancelled_waiters():
+    async def run():
+        queue = FairQueue()
+        first, second, third = queue.push(MUTATION), queue.push(MUTATION), queue.push(MUTATION)
+        queue.remove(first)
+        second.cancel()
+        return queue.pop() is third, queue.pop(), len(queue)
+
+    assert asyncio.run(run()) == (True, None, 0)
+
+
+def test_limiter_queues_calls_over_the_limit():
+    limiter = ConcurrencyLimiter(max_limit=2, adaptive=False)
+
+    async def run():
+        active = []
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with limiter.slot("GET", "/v1/users"):
+                active.append(1)
+                peak = max(peak, len(active))
+                await asyncio.sleep(0.02)
+                active.pop()
+
+        await asyncio.gather(*(work() for _ in range(6)))
+        return peak
+
+    assert asyncio.run(run()) == 2
+    assert limiter.in_flight == 0
+    assert limiter.queued == 4
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    limiter = ConcurrencyLimiter(max_limit=1, adaptive=False)
+
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release("GET", "/v1/users")
+        return limiter.in_flight, len(limiter._waiters)
+
+    assert asyncio.run(run()) == (0, 0)
+
+
+def test_limit_grows_while_in_use_and_is_cut_on_overload():
+    limiter = ConcurrencyLimiter(initial=1, max_limit=10)
+
+    async def run():
+        for _ in range(5):
+            async with limiter.slot("GET", "/v1/users"):
+                pass
+        grown = limiter.limit
+        async with limiter.slot("GET", "/v1/users") as outcome:
+            outcome.overloaded = True
+        return grown, limiter.limit
+
+    grown, cut = asyncio.run(run())
+    assert grown > 1
+    assert cut == pytest.approx(grown * 0.7)
+    assert limiter.cuts == 1
+
+
+def test_timeout_cuts_the_limit():
+    limiter = ConcurrencyLimiter(initial=10, max_limit=10)
+
+    async def run():
+        with pytest.raises(httpx.ReadTimeout):
+            async with limiter.slot("GET", "/v1/users"):
+                raise httpx.ReadTimeout("slow")
+
+    asyncio.run(run())
+    assert limiter.limit == pytest.approx(7)
+    assert limiter.in_flight == 0
+
+
+def test_latency_baselines_are_kept_per_method():
+    limiter = ConcurrencyLimiter(initial=10, max_limit=10)
+    limiter._baselines["GET /v1/reports"] = 0.001
+
+    async def run():
+        await limiter.acquire()
+        # A slow POST is not compared with the fast GET baseline of the same path
+        limiter.release("POST", "/v1/reports", started=time.monotonic() - 1.0)
+
+    asyncio.run(run())
+    assert limiter.cuts == 0
+    assert limiter._baselines["POST /v1/reports"] >= 1.0
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import stat
+
+from mcp_server_peakmojo.disk_cache import DiskCache, credentials_fingerprint
+
+
+def test_round_trip_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache" / "responses.db")
+
+    async def run():
+        writer = DiskCache(path, "fp", max_bytes=1 << 20)
+        writer.set("GET /v1/users", {"data": [1, 2]}, ttl=60, etag='"v1"')
+        await writer.close()
+        reader = DiskCache(path, "fp", max_bytes=1 << 20)
+        entry = await reader.get("GET /v1/users")
+        await reader.close()
+        return entry
+
+    entry = asyncio.run(run())
+    assert entry.value == {"data": [1, 2]}
+    assert entry.ttl == 60
+    assert entry.etag == '"v1"'
+
+
+def test_other_credentials_do_not_share_entries(tmp_path):
+    path = str(tmp_path / "responses.db")
+
+    async def run():
+        first = DiskCache(path, credentials_fingerprint("https://api", "a"), max_bytes=1 << 20)
+        second = DiskCache(path, credentials_fingerprint("https://api", "b"), max_bytes=1 << 20)
+        first.set("GET /v1/users", {"data": []}, ttl=60)
+        await first.flush()
+        entry = await second.get("GET /v1/users")
+        await first.close()
+        await second.close()
+        return entry
+
+    assert asyncio.run(run()) is None
+
+
+def test_database_is_private(tmp_path):
+    path = str(tmp_path / "responses.db")
+
+    async def run():
+        cache = DiskCache(path, "fp", max_bytes=1 << 20)
+        await cache.close()
+
+    asyncio.run(run())
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_corrupt_row_is_dropped(tmp_path):
+    path = str(tmp_path / "responses.db")
+
+    async def run():
+        cache = DiskCache(path, "fp", max_bytes=1 << 20)
+        cache.set("GET /v1/users", {"data": []}, ttl=60)
+        await cache.flush()
+        cache._db.execute("UPDATE responses SET value = ?", (b"not zlib",))
+        first = await cache.get("GET /v1/users")
+        stats = cache.stats()
+        await cache.close()
+        return first, stats
+
+    entry, stats = asyncio.run(run())
+    assert entry is None
+    assert stats["entries"] == 0
+    assert stats["errors"] == 1
+
+
+def test_invalidate_and_size_cap(tmp_path):
+    path = str(tmp_path / "responses.db")
+
+    async def run():
+        cache = DiskCache(path, "fp", max_bytes=2000)
+        for index in range(50):
+            cache.set(f"GET /v1/items/{index}", {"id": index, "pad": str(index) * 100}, ttl=60)
+        cache.invalidate(lambda endpoint: endpoint == "/v1/items/49")
+        await cache.flush()
+        stats = cache.stats()
+        entry = await cache.get("GET /v1/items/49")
+        await cache.close()
+        return stats, entry
+
+    stats, entry = asyncio.run(run())
+    assert stats["bytes"] <= 2000
+    assert 0 < stats["entries"] < 50
+    assert entry is None
+
+
+def test_tracked_size_matches_database(tmp_path):
+    path = str(tmp_path / "responses.db")
+
+    async def run():
+        cache = DiskCache(path, "fp", max_bytes=3000)
+        for index in range(40):
+            cache.set(f"GET /v1/items/{index % 25}", {"id": index, "pad": str(index) * 80}, ttl=60)
+        cache.invalidate(lambda endpoint: endpoint.endswith("/3"))
+        await cache.flush()
+        counted = cache._db.execute("SELECT COUNT(*), SUM(size) FROM responses").fetchone()
+        # Reading stats never waits on the database
+        with cache._lock:
+            stats = cache.stats()
+        await cache.close()
+        return counted, stats
+
+    (entries, size), stats = asyncio.run(run())
+    assert (stats["entries"], stats["bytes"]) == (entries, size)
+    assert size <= 3000
@@ -0,0 +1,156 @@
+import asyncio
+
+import httpx
+import pytest
+
+from mcp_server_peakmojo.pagination import detect_pagination, paginate
+
+
+def users(start, count):
+    return [{"id": index} for index in range(start, start + count)]
+
+
+def not_found(endpoint, params):
+    request = httpx.Request("GET", f"https://api.example.com{endpoint}", params=params)
+    response = httpx.Response(404, request=request)
+    return httpx.HTTPStatusError("Client error '404 Not Found'", request=request, response=response)
+
+
+def run_paginate(pages, first_page, **kwargs):
+    """Paginate over pages, a function of the requested params, recording every request"""
+    requested = []
+
+    async def fetch_page(endpoint, params):
+        requested.append(params)
+        return pages(endpoint, params)
+
+    scheme = detect_pagination(first_page)
+    merged = asyncio.run(paginate(fetch_page, first_page, scheme, "/v1/users", {}, **kwargs))
+    return merged, requested
+
+
+@pytest.mark.parametrize("body, kind, param, position_key, last", [
+    ({"data": users(0, 2), "next_cursor": "abc"}, "cursor", "cursor", "", None),
+    ({"items": users(0, 2), "meta": {"nextPageToken": "t"}}, "cursor", "pageToken", "", None),
+    ({"data": users(0, 2), "page": 1, "total_pages": 3}, "page", "page", "page", 3),
+    ({"data": users(0, 2), "page": 1, "total": 5, "per_page": 2}, "page", "page", "page", 3),
+    ({"results": users(0, 2), "pagination": {"current_page": 1}}, "page", "page", "current_page", None),
+    ({"data": users(0, 2), "current_page": 1, "last_page": 3}, "page", "page", "current_page", 3),
+    ({"data": users(0, 2), "offset": 0, "limit": 2, "total": 5}, "offset", "offset", "offset", 4),
+    ({"data": users(0, 2), "skip": 0, "limit": 2}, "offset", "skip", "skip", None),
+    ({"records": users(0, 2), "next": "/v1/users?after=2"}, "next", "", "", None),
+])
+def test_detect_pagination(body, kind, param, position_key, last):
+    scheme = detect_pagination(body)
+    assert scheme.kind == kind
+    assert scheme.param == param
+    assert scheme.position_key == position_key
+    assert scheme.last == last
+
+
+def test_detect_pagination_prefers_cursor_over_page():
+    scheme = detect_pagination({"data": [], "page": 1, "next_cursor": "abc"})
+    assert scheme.kind == "cursor"
+
+
+def test_detect_pagination_offset_step_defaults_to_page_size():
+    scheme = detect_pagination({"data": users(0, 3), "offset": 0})
+    assert scheme.step == 3
+
+
+@pytest.mark.parametrize("body", [
+    [{"id": 1}],
+    {"id": 1},
+    {"data": "not a list", "page": 1},
+    {"data": users(0, 2)},
+    {"data": users(0, 2), "next_cursor": ""},
+])
+def test_detect_pagination_none(body):
+    assert detect_pagination(body) is None
+
+
+def test_paginate_known_page_count():
+    first = {"data": users(0, 2), "page": 1, "total_pages": 3}
+    merged, requested = run_paginate(lambda endpoint, params: {"data": users(params["page"] * 2 - 2, 2), "page": params["page"]}, first)
+    assert [item["id"] for item in merged["data"]] == list(range(6))
+    assert [params["page"] for params in requested] == [2, 3]
+    assert merged["auto_pagination"]["stop_reason"] == "exhausted"
+
+
+def test_paginate_laravel_style_page_numbers():
+    # Responses report current_page/last_page but the request parameter is page
+    def pages(endpoint, params):
+        page = params.get("page", 1)
+        return {"data": users(page * 2 - 2, 2), "current_page": page, "last_page": 3}
+
+    merged, requested = run_paginate(pages, pages("/v1/users", {}))
+    assert [item["id"] for item in merged["data"]] == list(range(6))
+    assert requested == [{"page": 2}, {"page": 3}]
+
+
+def test_paginate_ignored_page_parameter_is_not_repeated():
+    # An API ignoring the page parameter answers page 1 every time, even with a known page count
+    first = {"data": users(0, 2), "page": 1, "total_pages": 3}
+    merged, _ = run_paginate(lambda endpoint, params: first, first)
+    assert [item["id"] for item in merged["data"]] == [0, 1]
+    assert merged["auto_pagination"]["pages_fetched"] == 1
+
+
+def test_paginate_client_error_past_end_ends_list():
+    def pages(endpoint, params):
+        if params["page"] > 3:
+            raise not_found(endpoint, params)
+        return {"data": users(params["page"] * 2 - 2, 2), "page": params["page"]}
+
+    merged, _ = run_paginate(pages, {"data": users(0, 2), "page": 1})
+    assert [item["id"] for item in merged["data"]] == list(range(6))
+    assert merged["auto_pagination"]["pages_fetched"] == 3
+    assert merged["auto_pagination"]["stop_reason"] == "exhausted"
+
+
+def test_paginate_server_error_is_raised():
+    def pages(endpoint, params):
+        request = httpx.Request("GET", "https://api.example.com/v1/users")
+        raise httpx.HTTPStatusError("Server error", request=request, response=httpx.Response(500, request=request))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        run_paginate(pages, {"data": users(0, 2), "page": 1})
+
+
+def test_paginate_clamped_pages_are_not_repeated():
+    # Out of range pages are answered with the last page, reporting its number
+    def pages(endpoint, params):
+        page = min(params["page"], 3)
+        return {"data": users(page * 2 - 2, 2), "page": page}
+
+    merged, requested = run_paginate(pages, {"data": users(0, 2), "page": 1}, max_pages=50)
+    assert [item["id"] for item in merged["data"]] == list(range(6))
+    assert len(requested) < 10
+
+
+def test_paginate_short_page_ends_list():
+    def pages(endpoint, params):
+        return {"data": users(2, 1) if params["page"] == 2 else users(0, 2)}
+
+    merged, _ = run_paginate(pages, {"data": users(0, 2), "page": 1}, window=1)
+    assert [item["id"] for item in merged["data"]] == [0, 1, 2]
+    assert merged["auto_pagination"]["pages_fetched"] == 2
+
+
+def test_paginate_offset_stops_at_limit():
+    first = {"data": users(0, 2), "offset": 0, "limit": 2, "total": 10}
+    merged, _ = run_paginate(lambda endpoint, params: {"data": users(params["offset"], 2), "offset": params["offset"]}, first, max_items=5)
+    assert [item["id"] for item in merged["data"]] == list(range(5))
+    assert merged["auto_pagination"]["stop_reason"] == "limit"
+
+
+def test_paginate_cursor():
+    def pages(endpoint, params):
+        if params["cursor"] == "b":
+            return {"data": users(2, 2), "next_cursor": "c"}
+        return {"data": users(4, 1)}
+
+    merged, requested = run_paginate(pages, {"data": users(0, 2), "next_cursor": "b"})
+    assert [item["id"] for item in merged["data"]] == list(range(5))
+    assert [params["cursor"] for params in requested] == ["b", "c"]
+    assert "next_cursor" not in merged
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+
+from mcp_server_peakmojo.ratelimit import RateLimiter, TokenBucket, parse_rate_limit_reset, parse_retry_after
+
+
+@pytest.mark.parametrize("value, expected", [(None, None), ("", None), ("3", 3.0), (" 1.5 ", 1.5), ("-2", 0.0), ("soon", None)])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    delay = parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert 28 <= delay <= 31
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({}, None),
+    ({"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "10"}, None),
+    ({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "10"}, 10.0),
+    ({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "later"}, None),
+])
+def test_parse_rate_limit_reset(headers, expected):
+    assert parse_rate_limit_reset(headers) == expected
+
+
+def test_parse_rate_limit_reset_epoch():
+    delay = parse_rate_limit_reset({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(time.time()) + 20)})
+    assert 18 <= delay <= 21
+
+
+def test_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=20, burst=2)
+
+    async def run():
+        started = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # Two tokens at once, then one every 50 ms
+    elapsed = asyncio.run(run())
+    assert 0.08 <= elapsed < 0.3
+    assert bucket.throttled == 2
+
+
+def test_bucket_without_rate_honours_pause():
+    bucket = TokenBucket()
+
+    async def run():
+        bucket.pause(0.1)
+        return await bucket.acquire()
+
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_endpoint_bucket_is_drawn_with_global_bucket():
+    limiter = RateLimiter(rate=100, endpoint_limits={"/v1/reports/*": {"rate": 1, "burst": 3}})
+    assert limiter.buckets_for("/v1/reports/7") == [limiter._buckets["/v1/reports/*"], limiter.global_bucket]
+    assert limiter.buckets_for("/v1/users") == [limiter.global_bucket]
+
+
+@pytest.mark.parametrize("status, headers, pause", [
+    (200, {}, None),
+    (429, {}, 1.0),
+    (429, {"Retry-After": "5"}, 5.0),
+    (503, {}, None),
+    (503, {"Retry-After": "2"}, 2.0),
+    (200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "4"}, 4.0),
+])
+def test_observe_pauses_most_specific_bucket(status, headers, pause):
+    limiter = RateLimiter(endpoint_limits={"/v1/reports/*": 10})
+    assert limiter.observe("/v1/reports/7", status, headers) == pause
+    paused_for = limiter.stats()["endpoints"]["/v1/reports/*"]["paused_for"]
+    assert paused_for == pytest.approx(pause or 0.0, abs=0.05)
+    assert limiter.stats()["global"]["paused_for"] == 0.0
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from mcp_server_peakmojo.retry import RetryPolicy
+
+
+@pytest.mark.parametrize("method, key, retryable", [
+    ("GET", None, True),
+    ("get", None, True),
+    ("PUT", None, True),
+    ("DELETE", None, True),
+    ("POST", None, False),
+    ("PATCH", None, False),
+    ("POST", "k1", True),
+    ("PATCH", "k1", True),
+])
+def test_is_retryable(method, key, retryable):
+    assert RetryPolicy().is_retryable(method, key) is retryable
+
+
+def test_backoff_is_capped_full_jitter():
+    random.seed(1)
+    policy = RetryPolicy(base_delay=0.1, max_delay=1.0)
+    for attempt, cap in [(1, 0.1), (2, 0.2), (3, 0.4), (4, 0.8), (5, 1.0), (10, 1.0)]:
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert max(delays) > cap * 0.8
+
+
+def test_at_least_one_attempt():
+    assert RetryPolicy(attempts=0).attempts == 1
+
+
+def test_stats_count_retries_by_reason():
+    policy = RetryPolicy()
+    for reason in ("503", "ConnectError", "503"):
+        policy.record_retry(reason)
+    policy.exhausted += 1
+    stats = policy.stats()
+    assert stats["retries"] == {"503": 2, "ConnectError": 1}
+    assert stats["exhausted"] == 1
@@ -0,0 +1,116 @@
+import json
+import math
+import random
+
+import pytest
+import yaml
+
+from mcp_server_peakmojo.serializers import dump_fast_yaml, serialize
+
+TRICKY_STRINGS = [
+    "", " ", "plain", "two words", "trailing ", " leading", "a.b/c-d_e",
+    # YAML 1.1 booleans and nulls
+    "y", "Y", "n", "yes", "No", "TRUE", "false", "on", "Off", "null", "Null", "~",
+    # Numbers, dates and sexagesimals in disguise
+    "1", "-1", "1.5", "1e3", ".5", "0x1F", "0o17", "017", "1_000", "12:30", "190:20:30", "2024-01-01", "2024-01-01 10:00:00",
+    ".inf", "-.inf", ".nan", "nan", "inf",
+    # Indicators and syntax
+    "-", "- item", "? key", ": value", "a: b", "a #comment", "#", "&anchor", "*alias", "!tag", "|", ">", "%",
+    "@", "`", "'single'", '"double"', "{a: 1}", "[1, 2]", "a, b", "key:", "---", "...",
+    # Escapes and unicode
+    "line\nbreak", "tab\there", "cr\rlf", "back\\slash", "nul\x00", "bell\x07", "del\x7f", "nel\x85",
+    "sep ", "bom﻿", "ünïcødé", "✓ done", "😀", "中文",
+]
+
+TRICKY_FLOATS = [0.0, -0.0, 1.5, -2.25, 3.0, 1e16, 1e-7, 1.5e300, -1e-300, 123456789.125, float("inf"), float("-inf")]
+
+
+def round_trip(value):
+    return yaml.safe_load(dump_fast_yaml(value))
+
+
+@pytest.mark.parametrize("text", TRICKY_STRINGS)
+def test_strings_round_trip(text):
+    assert round_trip(text) == text
+    assert round_trip({text: text}) == {text: text}
+    assert round_trip([text]) == [text]
+
+
+@pytest.mark.parametrize("number", TRICKY_FLOATS)
+def test_floats_round_trip(number):
+    loaded = round_trip([number])[0]
+    assert isinstance(loaded, float)
+    assert loaded == number
+    assert math.copysign(1, loaded) == math.copysign(1, number)
+
+
+def test_nan_round_trips():
+    assert math.isnan(round_trip(float("nan")))
+
+
+@pytest.mark.parametrize("value", [0, -7, 2 ** 70, True, False, None])
+def test_scalars_round_trip(value):
+    loaded = round_trip({"value": value})["value"]
+    assert loaded == value
+    assert type(loaded) is type(value)
+
+
+@pytest.mark.parametrize("value", [{}, [], {"a": {}}, {"a": []}, [[], {}], [[1, [2, [3]]]], [{"a": [{"b": []}]}]])
+def test_empty_and_nested_containers(value):
+    assert round_trip(value) == value
+
+
+def test_layout_matches_pyyaml_block_style():
+    value = {"users": [{"id": 1, "tags": ["a", "b"]}, {"id": 2, "tags": []}], "page": {"number": 1}}
+    assert dump_fast_yaml(value) == (
+        "users:\n"
+        "- id: 1\n"
+        "  tags:\n"
+        "  - a\n"
+        "  - b\n"
+        "- id: 2\n"
+        "  tags: []\n"
+        "page:\n"
+        "  number: 1\n"
+    )
+
+
+def random_document(rng: random.Random, depth: int = 0):
+    kind = rng.random()
+    if depth < 4 and kind < 0.2:
+        return {rng.choice(TRICKY_STRINGS): random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    if depth < 4 and kind < 0.4:
+        return [random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return rng.choice([
+        rng.choice(TRICKY_STRINGS),
+        rng.choice(TRICKY_FLOATS),
+        rng.randint(-10 ** 12, 10 ** 12),
+        rng.uniform(-1e6, 1e6),
+        rng.choice([True, False, None]),
+    ])
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_random_documents_round_trip(seed):
+    document = random_document(random.Random(seed))
+    assert round_trip(document) == document
+
+
+def test_json_documents_round_trip():
+    # Shapes as they come out of json.loads, including key order
+    document = json.loads('{"data": [{"id": 1, "name": "Ann", "score": 9.5, "bio": null}], "page": 1, "has_more": false}')
+    loaded = round_trip(document)
+    assert loaded == document
+    assert list(loaded) == list(document)
+
+
+@pytest.mark.parametrize("output_format", ["yaml", "yaml-fast", "json"])
+def test_serialize_formats_agree(output_format):
+    value = {"data": [{"id": 1, "name": "yes"}], "total": 1.0}
+    text = serialize(value, output_format)
+    assert (json.loads(text) if output_format == "json" else yaml.safe_load(text)) == value
+
+
+def test_serialize_unknown_format():
+    with pytest.raises(ValueError):
+        serialize({}, "xml")
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from mcp_server_peakmojo.server import PeakMojoQuerier, parse_arguments
+
+
+def make_querier(handler, *argv):
+    """Build a querier whose requests are answered by handler instead of the network"""
+    querier = PeakMojoQuerier(parse_arguments(["--api-key", "test", "--base-url", "https://api.example.com", *argv]))
+    querier._client = httpx.AsyncClient(base_url=querier.base_url, headers=querier.get_headers(), transport=httpx.MockTransport(handler))
+    return querier
+
+
+def users_page(request):
+    return httpx.Response(200, json={"data": [{"id": index, "name": f"user {index}"} for index in range(20)], "cache": "upstream"})
+
+
+def test_cache_block_is_separate_from_api_data():
+    querier = make_querier(users_page, "--output-format", "json")
+
+    async def run():
+        await querier.execute_query("/v1/users")
+        return await querier.execute_query("/v1/users")
+
+    content = asyncio.run(run())
+    assert json.loads(content[0].text)["cache"] == "upstream"
+    assert json.loads(content[1].text)["cache"]["stale"] is False
+
+
+def test_cache_block_counts_against_budget():
+    querier = make_querier(users_page, "--output-format", "json")
+
+    async def run():
+        await querier.execute_query("/v1/users")
+        return [await querier.execute_query("/v1/users", max_bytes=budget) for budget in (200, 30)]
+
+    with_block, without_block = asyncio.run(run())
+    assert len(with_block) == 2
+    assert sum(len(part.text.encode("utf-8")) for part in with_block) <= 200
+    # No room for the block next to the data
+    assert len(without_block) == 1
+    assert len(without_block[0].text.encode("utf-8")) <= 30
+
+
+def test_coalesced_get_applies_each_callers_timeout():
+    calls = []
+
+    async def slow_users(request):
+        calls.append(request)
+        await asyncio.sleep(1.0)
+        return users_page(request)
+
+    async def run(first, second):
+        querier = make_querier(slow_users)
+        started = time.monotonic()
+
+        async def timed(total):
+            try:
+                await querier.fetch("/v1/users", timeout={"total": total})
+                return "ok", time.monotonic() - started
+            except httpx.TimeoutException:
+                return "timeout", time.monotonic() - started
+
+        return await asyncio.gather(timed(first), timed(second))
+
+    for first, second in ((5, 0.2), (0.2, 5)):
+        calls.clear()
+        results = dict(zip((first, second), asyncio.run(run(first, second))))
+        assert len(calls) == 1
+        short_outcome, short_elapsed = results[0.2]
+        assert short_outcome == "timeout" and short_elapsed < 0.6
+        long_outcome, long_elapsed = results[5]
+        assert long_outcome == "ok" and long_elapsed >= 0.9
+
+
+def test_failed_stream_removes_spill_file(tmp_path):
+    def broken_list(request):
+        return httpx.Response(200, content=b'{"data": [1, 2, 3, 4')
+
+    querier = make_querier(broken_list, "--spill-dir", str(tmp_path))
+    with pytest.raises(ValueError):
+        asyncio.run(querier.fetch_streamed("/v1/users", max_items=1, spill=True))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stream_spills_items_beyond_max_items(tmp_path):
+    def users_list(request):
+        return httpx.Response(200, json={"data": [1, 2, 3, 4]})
+
+    querier = make_querier(users_list, "--spill-dir", str(tmp_path))
+    result = asyncio.run(querier.fetch_streamed("/v1/users", max_items=1, spill=True))
+    assert result["data"] == [1]
+    with open(result["streaming"]["spill_file"], encoding="utf-8") as spilled:
+        assert spilled.read().split() == ["2", "3", "4"]
+
+
+def scripted(*responses):
+    """Build a handler answering with responses in turn, recording every request"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return responses[min(len(requests), len(responses)) - 1]
+
+    return handler, requests
+
+
+RETRY_ARGS = ("--retry-base-delay", "0", "--retry-attempts", "3")
+
+
+def test_post_without_idempotency_key_is_not_retried():
+    handler, requests = scripted(httpx.Response(503), httpx.Response(200, json={"id": 1}))
+    querier = make_querier(handler, *RETRY_ARGS)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(querier.fetch("/v1/users", method="POST", data={"name": "a"}))
+    assert len(requests) == 1
+
+
+def test_post_with_idempotency_key_is_retried():
+    handler, requests = scripted(httpx.Response(503), httpx.Response(201, json={"id": 1}))
+    querier = make_querier(handler, *RETRY_ARGS)
+    assert asyncio.run(querier.fetch("/v1/users", method="POST", data={"name": "a"}, idempotency_key="k1")) == {"id": 1}
+    assert len(requests) == 2
+    assert [request.headers["Idempotency-Key"] for request in requests] == ["k1", "k1"]
+    assert querier.retry_policy.retries == {"503": 1}
+
+
+def test_rate_limited_request_is_resent_after_retry_after():
+    handler, requests = scripted(httpx.Response(429, headers={"Retry-After": "0.2"}), httpx.Response(200, json={"id": 1}))
+    querier = make_querier(handler, *RETRY_ARGS)
+    started = time.monotonic()
+    assert asyncio.run(querier.fetch("/v1/users/1")) == {"id": 1}
+    assert len(requests) == 2
+    assert time.monotonic() - started >= 0.2
+
+
+def test_rate_limited_request_gives_up_after_retries():
+    handler, requests = scripted(httpx.Response(429, headers={"Retry-After": "0"}))
+    querier = make_querier(handler, *RETRY_ARGS, "--rate-limit-retries", "2")
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(querier.fetch("/v1/users/1"))
+    assert len(requests) == 3
+
+
+def test_open_breaker_serves_stale_response():
+    handler, requests = scripted(httpx.Response(200, json={"id": 1}), httpx.Response(503))
+    querier = make_querier(
+        handler, *RETRY_ARGS, "--retry-attempts", "1", "--cache-ttl", "0.05",
+        "--breaker-min-calls", "2", "--breaker-failure-rate", "0.5", "--breaker-open-seconds", "60",
+    )
+
+    async def run():
+        await querier.fetch("/v1/users/1")
+        await asyncio.sleep(0.1)
+        # The failed refresh opens the circuit, and both calls fall back to the expired entry
+        failed = await querier.fetch_with_cache_info("/v1/users/1")
+        rejected = await querier.fetch_with_cache_info("/v1/users/1")
+        return failed, rejected
+
+    (failed_value, failed_info), (rejected_value, rejected_info) = asyncio.run(run())
+    assert failed_value == rejected_value == {"id": 1}
+    assert failed_info["error"] == "HTTP 503"
+    assert "Circuit" in rejected_info["error"]
+    assert len(requests) == 2
+    assert querier.breakers.stats()["/v1/users"]["state"] == "open"
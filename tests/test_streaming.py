@@ -0,0 +1,125 @@
+import json
+import os
+import random
+import time
+
+import pytest
+
+from mcp_server_peakmojo.streaming import StreamingJsonDecoder, remove_old_spill_files
+
+DOCUMENTS = [
+    [],
+    [1, 2.5, -3e2, True, False, None],
+    ["a", "b,]}", "c\"[{", "\\", "ünïcødé ✓ 😀"],
+    [{"id": 1, "tags": ["x", "y"]}, {"id": 2, "nested": {"deep": [[], {}, [{"a": "]"}]]}}],
+    {"data": [], "page": 1},
+    {"page": 1, "data": [{"id": 1}, {"id": 2}], "total": 2, "meta": {"next": None}},
+    {"meta": {"items": [1, 2]}, "items": [{"text": "}{][\",\\\""}, [1, [2, [3]]]], "done": True},
+    {"results": [1, 2], "data": [3, 4]},
+    {"id": 1, "name": "not a list"},
+    {},
+    42,
+    "just a string",
+]
+
+
+def decode(body: bytes, chunk_sizes):
+    """Feed body in chunks of the given sizes, returning the items seen before close and the result"""
+    decoder = StreamingJsonDecoder()
+    items = []
+    position = 0
+    for size in chunk_sizes:
+        items += decoder.feed(body[position:position + size])
+        position += size
+    items += decoder.feed(body[position:])
+    streamed = len(items)
+    items += decoder.close()
+    return decoder.result(items), streamed
+
+
+def random_splits(length: int, rng: random.Random):
+    sizes = []
+    while sum(sizes) < length:
+        sizes.append(rng.randint(1, 7))
+    return sizes
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_whole_body(document, indent):
+    body = json.dumps(document, ensure_ascii=False, indent=indent).encode("utf-8")
+    result, _ = decode(body, [len(body)])
+    assert result == document
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_one_byte_chunks(document):
+    # Splits every multi-byte character and every token
+    body = json.dumps(document, ensure_ascii=False).encode("utf-8")
+    result, _ = decode(body, [1] * len(body))
+    assert result == document
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_chunk_boundaries(seed):
+    rng = random.Random(seed)
+    document = rng.choice(DOCUMENTS)
+    body = json.dumps(document, ensure_ascii=False, indent=rng.choice([None, 1])).encode("utf-8")
+    result, _ = decode(body, random_splits(len(body), rng))
+    assert result == document
+
+
+def test_large_item_split_across_many_chunks():
+    # Scanning of an incomplete item resumes where it stopped as consumed input is dropped
+    items = [{"id": index, "body": "x" * 500, "children": [{"name": f"c{child}", "text": "[{\"}]"} for child in range(20)]} for index in range(5)]
+    body = json.dumps({"total": 5, "data": items}).encode("utf-8")
+    result, _ = decode(body, [13] * (len(body) // 13))
+    assert result == {"total": 5, "data": items}
+
+
+def test_items_are_yielded_before_close():
+    body = json.dumps({"data": [{"id": index} for index in range(10)], "page": 1}).encode("utf-8")
+    decoder = StreamingJsonDecoder()
+    early = decoder.feed(body[:len(body) // 2])
+    assert early == [{"id": index} for index in range(len(early))]
+    assert 0 < len(early) < 10
+
+
+def test_first_items_key_is_streamed():
+    decoder = StreamingJsonDecoder()
+    items = decoder.feed(json.dumps({"results": [1, 2], "data": [3]}).encode("utf-8")) + decoder.close()
+    assert decoder.items_key == "results"
+    assert items == [1, 2]
+    assert decoder.envelope == {"data": [3]}
+
+
+def test_scalar_at_chunk_end_waits_for_delimiter():
+    # "2" may continue as "23" in the next chunk
+    decoder = StreamingJsonDecoder()
+    assert decoder.feed(b"[1, 2") == [1]
+    assert decoder.feed(b"3]") == [23]
+    assert decoder.close() == []
+
+
+def test_empty_body():
+    with pytest.raises(ValueError):
+        StreamingJsonDecoder().close()
+
+
+@pytest.mark.parametrize("body", [b'{"data": [1, 2', b'[{"id": 1}', b'{"page": 1'])
+def test_incomplete_document(body):
+    decoder = StreamingJsonDecoder()
+    decoder.feed(body)
+    with pytest.raises(ValueError):
+        decoder.close()
+
+
+def test_remove_old_spill_files(tmp_path):
+    old, new, other = tmp_path / "peakmojo-old.jsonl", tmp_path / "peakmojo-new.jsonl", tmp_path / "other.jsonl"
+    for path in (old, new, other):
+        path.write_text("1\n")
+    day_ago = time.time() - 86400
+    for path in (old, other):
+        os.utime(path, (day_ago, day_ago))
+    assert remove_old_spill_files(str(tmp_path), 3600) == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["other.jsonl", "peakmojo-new.jsonl"]